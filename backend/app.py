@@ -3,14 +3,23 @@ Credit Card Statement Parser - Flask Backend
 Main Application File
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+import hmac
 import os
 from datetime import datetime
 import traceback
+import uuid
 
 from services.pdf_parser import PDFParserService
+from services.text_store import TextStore, valid_content_hash
+from services.duplicate_index import DuplicateIndex
+from services.extraction_tiers import ParseLimitExceeded, build_tiers
+from services.sandbox import SandboxedParser
+from services.upload_manager import UploadError, UploadManager, supported_encodings
+from services.issuer_registry import IssuerRegistry
+from services.profiler import ProfilingService
 from config import Config
 
 # Initialize Flask app
@@ -19,7 +28,56 @@ app.config.from_object(Config)
 CORS(app)
 
 # Initialize services
-parser_service = PDFParserService()
+text_store = TextStore(
+    app.config['TEXT_STORE_FOLDER'],
+    retention=app.config['TEXT_STORE_RETENTION']
+) if app.config['STORE_EXTRACTED_TEXT'] else None
+duplicate_index = DuplicateIndex(
+    app.config['DUPLICATE_INDEX_PATH'] or ':memory:',
+    threshold=app.config['DUPLICATE_SIMILARITY'],
+    max_rows=app.config['DUPLICATE_INDEX_MAX_ROWS'],
+    retention=app.config['DUPLICATE_INDEX_RETENTION']
+) if app.config['DEDUPE_ENABLED'] else None
+issuer_registry = IssuerRegistry(
+    app.config['ISSUER_PROFILES_FOLDER'],
+    reload_interval=app.config['ISSUER_RELOAD_INTERVAL']
+)
+parser_service = PDFParserService(
+    text_store=text_store,
+    tiers=build_tiers(app.config['EXTRACTION_TIERS']),
+    issuer_registry=issuer_registry,
+    max_pages=app.config['MAX_PDF_PAGES'],
+    max_chars=app.config['MAX_TEXT_CHARS'],
+    parse_timeout=app.config['PARSE_TIMEOUT'],
+    index_min_length=app.config['TEXT_INDEX_MIN_LENGTH'],
+    duplicate_index=duplicate_index
+)
+if app.config['SANDBOX_PARSING']:
+    # Hard kill a few seconds after the cooperative timeout would have fired
+    parser_service = SandboxedParser(
+        parser_service,
+        memory_limit_mb=app.config['SANDBOX_MEMORY_LIMIT_MB'],
+        timeout=app.config['PARSE_TIMEOUT'] + 5 if app.config['PARSE_TIMEOUT'] else 0
+    )
+
+upload_manager = UploadManager(
+    os.path.join(app.config['UPLOAD_FOLDER'], 'chunks'),
+    parse_fn=parser_service.parse_statement,
+    reextract_fn=parser_service.reextract if text_store else None,
+    max_workers=app.config['UPLOAD_PARSE_WORKERS'],
+    max_file_size=app.config['MAX_UPLOAD_FILE_SIZE'],
+    session_ttl=app.config['UPLOAD_SESSION_TTL'],
+    delete_after_parse=app.config['DELETE_AFTER_PARSE'],
+    receipt_secret=app.config['SECRET_KEY']
+)
+
+profiler = ProfilingService(
+    app.config['PROFILE_FOLDER'],
+    enabled=app.config['PROFILING_ENABLED'],
+    sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+    mode=app.config['PROFILER'],
+    max_files=app.config['PROFILE_MAX_FILES']
+)
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -34,7 +92,11 @@ def home():
         'version': '1.0.0',
         'endpoints': {
             'parse_statement': '/api/parse',
+            'batch_parse': '/api/batch-parse',
+            'chunked_upload': '/api/uploads',
+            'reextract': '/api/reextract',
             'supported_issuers': '/api/issuers',
+            'capabilities': '/api/capabilities',
             'health': '/health'
         }
     }), 200
@@ -49,14 +111,58 @@ def health_check():
     }), 200
 
 
+@app.route('/api/capabilities', methods=['GET'])
+def get_capabilities():
+    """Upload limits and scheduling hints for clients sending many files"""
+    return jsonify({
+        'status': 'success',
+        'max_concurrent_uploads': app.config['UPLOAD_CONCURRENCY_HINT'] or app.config['ASYNC_PARSE_WORKERS'],
+        'max_file_size': app.config['MAX_CONTENT_LENGTH'],
+        'allowed_extensions': sorted(app.config['ALLOWED_EXTENSIONS']),
+        'chunked_upload': {
+            'chunk_size': app.config['UPLOAD_CHUNK_SIZE'],
+            'max_file_size': app.config['MAX_UPLOAD_FILE_SIZE'],
+            'accepted_encodings': supported_encodings()
+        },
+        'deduplication': duplicate_index is not None
+    }), 200
+
+
 @app.route('/api/issuers', methods=['GET'])
 def get_supported_issuers():
     """Get list of supported credit card issuers"""
-    issuers = parser_service.get_supported_issuers()
+    matcher = issuer_registry.matcher
     return jsonify({
         'status': 'success',
-        'supported_issuers': issuers,
-        'count': len(issuers)
+        'supported_issuers': matcher.issuers,
+        'count': len(matcher.issuers),
+        'matcher': matcher.stats
+    }), 200
+
+
+@app.route('/api/issuers/reload', methods=['POST'])
+def reload_issuers():
+    """Recompile issuer profiles from disk immediately"""
+    try:
+        reloaded = issuer_registry.reload(force=True)
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Error reloading issuer profiles: {str(e)}'
+        }), 500
+    
+    if not reloaded:
+        return jsonify({
+            'status': 'error',
+            'message': 'Issuer profiles are invalid; previous profiles kept. Check the server log.'
+        }), 400
+    
+    matcher = issuer_registry.matcher
+    return jsonify({
+        'status': 'success',
+        'supported_issuers': matcher.issuers,
+        'count': len(matcher.issuers),
+        'matcher': matcher.stats
     }), 200
 
 
@@ -99,25 +205,33 @@ def parse_statement():
         
         # Save file securely
         filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"{timestamp}_{filename}"
+        # Microseconds plus a random suffix keep concurrent same-name uploads apart
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        unique_filename = f"{timestamp}_{uuid.uuid4().hex[:8]}_{filename}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
         file.save(filepath)
         
         try:
-            # Parse the PDF
-            result = parser_service.parse_statement(filepath, issuer_hint)
+            # Parse the PDF (under the profiler when asked for or sampled)
+            result, profile = profiler.call(
+                profile_requested(), parser_service.parse_statement, filepath, issuer_hint,
+                label=filename, isolated=app.config['SANDBOX_PARSING']
+            )
             
             # Clean up uploaded file
             if app.config['DELETE_AFTER_PARSE']:
                 os.remove(filepath)
             
-            return jsonify({
+            response = {
                 'status': 'success',
                 'data': result,
                 'filename': filename,
                 'parsed_at': datetime.now().isoformat()
-            }), 200
+            }
+            if profile:
+                profile['download'] = f"/api/admin/profiles/{profile['file']}"
+                response['profile'] = profile
+            return jsonify(response), 200
             
         except Exception as parse_error:
             # Clean up uploaded file on error
@@ -125,6 +239,12 @@ def parse_statement():
                 os.remove(filepath)
             raise parse_error
             
+    except ParseLimitExceeded as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Statement exceeds processing limits: {str(e)}'
+        }), 413
+    
     except Exception as e:
         app.logger.error(f"Error parsing statement: {str(e)}")
         app.logger.error(traceback.format_exc())
@@ -179,7 +299,7 @@ def batch_parse_statements():
                 # Save file
                 filename = secure_filename(file.filename)
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-                unique_filename = f"{timestamp}_{filename}"
+                unique_filename = f"{timestamp}_{uuid.uuid4().hex[:8]}_{filename}"
                 filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
                 file.save(filepath)
                 
@@ -206,6 +326,7 @@ def batch_parse_statements():
         return jsonify({
             'status': 'success',
             'parsed_count': len(results),
+            'duplicate_count': sum(1 for result in results if result['data'].get('duplicate_of')),
             'error_count': len(errors),
             'results': results,
             'errors': errors if errors else None,
@@ -220,6 +341,346 @@ def batch_parse_statements():
         }), 500
 
 
+@app.route('/api/reextract/<content_hash>', methods=['POST'])
+def reextract_statement(content_hash):
+    """
+    Re-run issuer detection and field extraction over stored statement text
+    
+    Requires an X-Admin-Token header
+    Optional: 'issuer' field (form or JSON) to specify the credit card issuer
+    
+    Returns: Extracted data points from the stored text
+    """
+    payload = request.get_json(silent=True)
+    payload = payload if isinstance(payload, dict) else {}
+    issuer_hint = payload.get('issuer') or request.form.get('issuer', None)
+    
+    body, status_code = reextract_one(content_hash, issuer_hint, admin_authorized())
+    return jsonify(body), status_code
+
+
+@app.route('/api/reextract', methods=['POST'])
+def batch_reextract_statements():
+    """
+    Re-extract data for many stored statements at once
+    
+    Requires an X-Admin-Token header
+    Expected: JSON body with a 'content_hashes' list, or {"all": true} to
+    re-extract every stored statement
+    
+    Returns: Array of extracted data from the requested statements
+    """
+    payload = request.get_json(silent=True)
+    body, status_code = reextract_many(payload if isinstance(payload, dict) else {}, admin_authorized())
+    return jsonify(body), status_code
+
+
+@app.route('/api/uploads', methods=['POST'])
+def init_upload():
+    """
+    Start a resumable chunked upload
+    
+    Expected: JSON with 'filename' and 'size' (bytes)
+    Optional: 'sha256' of the file (checked once all bytes arrive), 'issuer' hint,
+    and the 'receipt' an earlier finalize returned for the same sha256
+    
+    Returns: Upload session (upload_id, offset, chunk_size); 200 with 'data'
+    instead of 201 when the receipt makes the upload unnecessary
+    """
+    payload = request.get_json(silent=True) or {}
+    filename = secure_filename(payload.get('filename') or '')
+    
+    if not filename or not allowed_file(filename):
+        return jsonify({
+            'status': 'error',
+            'message': 'Invalid file type. Only PDF files are allowed.'
+        }), 400
+    
+    try:
+        size = int(payload.get('size', 0))
+        session = upload_manager.init_upload(
+            filename, size,
+            content_hash=payload.get('sha256'),
+            issuer_hint=payload.get('issuer'),
+            receipt=payload.get('receipt')
+        )
+    except (TypeError, ValueError):
+        return jsonify({
+            'status': 'error',
+            'message': 'File size must be an integer number of bytes.'
+        }), 400
+    except UploadError as e:
+        return upload_error_response(e)
+    
+    session['chunk_size'] = app.config['UPLOAD_CHUNK_SIZE']
+    session['accepted_encodings'] = supported_encodings()
+    return jsonify({
+        'status': 'success',
+        **session
+    }), 200 if session.get('deduplicated') else 201
+
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """
+    Upload one chunk of a file
+    
+    Expected: raw chunk bytes as the body, offset in the 'offset' query
+    parameter or 'Upload-Offset' header. The body may be compressed with
+    Content-Encoding gzip (or zstd when available); offsets always refer
+    to the uncompressed file.
+    
+    Returns: Upload session with the new offset; parsing starts as soon as
+    the last chunk lands
+    """
+    try:
+        offset = int(request.args.get('offset', request.headers.get('Upload-Offset', 0)))
+        session = upload_manager.write_chunk(
+            upload_id, offset, request.get_data(cache=False),
+            encoding=request.headers.get('Content-Encoding')
+        )
+    except ValueError:
+        return jsonify({
+            'status': 'error',
+            'message': 'Offset must be an integer.'
+        }), 400
+    except UploadError as e:
+        return upload_error_response(e)
+    
+    return jsonify({
+        'status': 'success',
+        **session
+    }), 200
+
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload_status(upload_id):
+    """Get upload progress; 'offset' is where an interrupted upload should resume"""
+    try:
+        session = upload_manager.get_status(upload_id)
+    except UploadError as e:
+        return upload_error_response(e)
+    
+    return jsonify({
+        'status': 'success',
+        **session
+    }), 200
+
+
+@app.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """
+    Finish an upload and return its parse result
+    
+    Returns: Same shape as /api/parse once parsing is done; 202 with the
+    session while parsing is still running
+    """
+    try:
+        session = upload_manager.finalize(upload_id, timeout=app.config['PARSE_TIMEOUT'] or None)
+    except UploadError as e:
+        return upload_error_response(e)
+    
+    body, status_code = upload_result(session)
+    return jsonify(body), status_code
+
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """List stored profiling artifacts (requires ADMIN_TOKEN)"""
+    if not admin_authorized():
+        return jsonify({
+            'status': 'error',
+            'message': 'Admin token required.'
+        }), 403
+    
+    profiles = profiler.list_profiles()
+    return jsonify({
+        'status': 'success',
+        'profiling_enabled': profiler.enabled,
+        'sample_rate': profiler.sample_rate,
+        'mode': profiler.mode,
+        'profiles': profiles,
+        'count': len(profiles)
+    }), 200
+
+
+@app.route('/api/admin/profiles/<path:name>', methods=['GET'])
+def download_profile(name):
+    """Download a profiling artifact (.prof for snakeviz/pstats, .txt or .html)"""
+    if not admin_authorized():
+        return jsonify({
+            'status': 'error',
+            'message': 'Admin token required.'
+        }), 403
+    
+    return send_from_directory(os.path.abspath(profiler.folder), name, as_attachment=True)
+
+
+def profile_requested():
+    """Whether the current request asked for a profile via query flag or header"""
+    flag = request.args.get('profile') or request.headers.get('X-Profile', '')
+    return flag.lower() in ('1', 'true', 'yes') and admin_authorized()
+
+
+def admin_authorized():
+    """Check the request's X-Admin-Token header against ADMIN_TOKEN"""
+    return admin_token_valid(request.headers.get('X-Admin-Token'))
+
+
+def admin_token_valid(token):
+    """Compare a presented admin token with ADMIN_TOKEN; always denied when none is configured"""
+    expected = app.config['ADMIN_TOKEN']
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8'))
+
+
+def reextract_one(content_hash, issuer_hint=None, is_admin=False):
+    """
+    Re-extract one stored statement (shared by app.py and asgi.py routes)
+    
+    Args:
+        content_hash: SHA-256 of the original PDF
+        issuer_hint: Optional issuer to use instead of detection
+        is_admin: Whether the request carried a valid admin token
+    
+    Returns: Tuple of (response body, HTTP status code)
+    """
+    # Re-extraction returns statement data, so a known content hash is not enough
+    if not is_admin:
+        return {
+            'status': 'error',
+            'message': 'Admin token required.'
+        }, 403
+    
+    if not parser_service.text_store:
+        return {
+            'status': 'error',
+            'message': 'Text storage is disabled. Enable STORE_EXTRACTED_TEXT to re-extract.'
+        }, 400
+    
+    if not valid_content_hash(content_hash):
+        return {
+            'status': 'error',
+            'message': f'No stored text found for {content_hash}.'
+        }, 404
+    
+    try:
+        result = parser_service.reextract(content_hash, issuer_hint)
+    except KeyError:
+        return {
+            'status': 'error',
+            'message': f'No stored text found for {content_hash}.'
+        }, 404
+    except ValueError as e:
+        return {
+            'status': 'error',
+            'message': f'Could not extract data from stored text: {str(e)}'
+        }, 422
+    except Exception as e:
+        app.logger.error(f"Error re-extracting statement: {str(e)}")
+        return {
+            'status': 'error',
+            'message': f'Error re-extracting statement: {str(e)}'
+        }, 500
+    
+    return {
+        'status': 'success',
+        'data': result,
+        'parsed_at': datetime.now().isoformat()
+    }, 200
+
+
+def reextract_many(payload, is_admin):
+    """
+    Re-extract the statements named in a bulk request body (shared by app.py and asgi.py routes)
+    
+    Args:
+        payload: Request JSON ('content_hashes' list, or 'all': true)
+        is_admin: Whether the request carried a valid admin token
+    
+    Returns: Tuple of (response body, HTTP status code)
+    """
+    if not is_admin:
+        return {
+            'status': 'error',
+            'message': 'Admin token required.'
+        }, 403
+    
+    if not parser_service.text_store:
+        return {
+            'status': 'error',
+            'message': 'Text storage is disabled. Enable STORE_EXTRACTED_TEXT to re-extract.'
+        }, 400
+    
+    if payload.get('all') is True:
+        content_hashes = parser_service.get_stored_hashes()
+    else:
+        content_hashes = payload.get('content_hashes')
+        if not isinstance(content_hashes, list) or not content_hashes or \
+                not all(isinstance(content_hash, str) for content_hash in content_hashes):
+            return {
+                'status': 'error',
+                'message': "Provide 'content_hashes' as a non-empty list of content hashes."
+            }, 400
+    
+    results = []
+    errors = []
+    
+    for content_hash in content_hashes:
+        try:
+            results.append({
+                'content_hash': content_hash,
+                'data': parser_service.reextract(content_hash),
+                'status': 'success'
+            })
+        except Exception as e:
+            errors.append({
+                'content_hash': content_hash,
+                'error': str(e)
+            })
+    
+    return {
+        'status': 'success',
+        'parsed_count': len(results),
+        'error_count': len(errors),
+        'results': results,
+        'errors': errors if errors else None,
+        'parsed_at': datetime.now().isoformat()
+    }, 200
+
+
+def upload_result(session):
+    """
+    Finalize response for an upload session view (shared by app.py and asgi.py routes)
+    
+    Returns: Tuple of (response body, HTTP status code); 202 while parsing is still running
+    """
+    if session['data'] is None:
+        return {
+            'status': 'success',
+            **session
+        }, 202
+    
+    return {
+        'status': 'success',
+        'data': session['data'],
+        'filename': session['filename'],
+        'content_hash': session['content_hash'],
+        'receipt': session.get('receipt'),
+        'parsed_at': datetime.now().isoformat()
+    }, 200
+
+
+def upload_error_response(error):
+    """Build the JSON response for an UploadError"""
+    return jsonify({
+        'status': 'error',
+        'message': str(error),
+        **error.details
+    }), error.status_code
+
+
 def allowed_file(filename):
     """Check if file has allowed extension"""
     return '.' in filename and \
@@ -0,0 +1,476 @@
+"""
+Credit Card Statement Parser - ASGI Backend
+Async variant of the API: upload I/O runs on the event loop and parsing is
+offloaded to a bounded thread pool. Every route that parses or re-extracts
+(including background parses of chunked uploads) shares that pool. Routes
+and response schema match app.py; routes without a native async handler are
+served by the Flask app itself.
+
+Run with: uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import json
+import os
+import traceback
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import partial
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+from werkzeug.utils import secure_filename
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:  # Older fallback bundled with Starlette
+    from starlette.middleware.wsgi import WSGIMiddleware
+
+from app import (
+    app as flask_app, admin_token_valid, allowed_file, parser_service, profiler,
+    reextract_many, reextract_one, upload_manager, upload_result
+)
+from services.extraction_tiers import ParseLimitExceeded
+from services.parse_executor import ParseExecutor
+from services.upload_manager import UploadError
+
+config = flask_app.config
+
+# Bounded pool for parser calls; extra requests wait on the loop, not on a thread
+parse_executor = ParseExecutor(
+    max_workers=config['ASYNC_PARSE_WORKERS'],
+    max_pending=config['ASYNC_PARSE_QUEUE']
+)
+# Completed chunked uploads parse on the same pool, so ASYNC_PARSE_WORKERS caps all parsing
+upload_manager.use_executor(parse_executor.executor)
+
+# Read uploads in 1MB pieces so a slow client never blocks the loop
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+async def parse_statement(request: Request) -> JSONResponse:
+    """
+    Parse credit card statement PDF
+
+    Expected: multipart/form-data with 'file' field
+    Optional: 'issuer' field to specify the credit card issuer
+
+    Returns: Extracted data points from the statement
+    """
+    rejected = check_content_length(request)
+    if rejected:
+        return rejected
+
+    try:
+        form = await limit_body(request).form()
+        file = form.get('file')
+
+        # Check if file is present
+        if file is None or not hasattr(file, 'filename'):
+            return JSONResponse({
+                'status': 'error',
+                'message': 'No file provided. Please upload a PDF file.'
+            }, status_code=400)
+
+        # Check if file is selected
+        if not file.filename:
+            return JSONResponse({
+                'status': 'error',
+                'message': 'No file selected.'
+            }, status_code=400)
+
+        # Check file extension
+        if not allowed_file(file.filename):
+            return JSONResponse({
+                'status': 'error',
+                'message': 'Invalid file type. Only PDF files are allowed.'
+            }, status_code=400)
+
+        # Get optional issuer parameter
+        issuer_hint = form.get('issuer') or None
+
+        filename = secure_filename(file.filename)
+        filepath = await save_upload(file, filename)
+
+        try:
+            # Parse the PDF off the event loop (under the profiler when asked for or sampled)
+            result, profile = await parse_executor.run(
+                partial(profiler.call, label=filename, isolated=config['SANDBOX_PARSING']),
+                profile_requested(request),
+                parser_service.parse_statement, filepath, issuer_hint
+            )
+
+            # Clean up uploaded file
+            if config['DELETE_AFTER_PARSE']:
+                os.remove(filepath)
+
+            response = {
+                'status': 'success',
+                'data': result,
+                'filename': filename,
+                'parsed_at': datetime.now().isoformat()
+            }
+            if profile:
+                profile['download'] = f"/api/admin/profiles/{profile['file']}"
+                response['profile'] = profile
+            return JSONResponse(response, status_code=200)
+
+        except Exception as parse_error:
+            # Clean up uploaded file on error
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            raise parse_error
+
+    except BodyTooLarge:
+        return too_large_response()
+
+    except ParseLimitExceeded as e:
+        return JSONResponse({
+            'status': 'error',
+            'message': f'Statement exceeds processing limits: {str(e)}'
+        }, status_code=413)
+
+    except Exception as e:
+        flask_app.logger.error(f"Error parsing statement: {str(e)}")
+        flask_app.logger.error(traceback.format_exc())
+
+        return JSONResponse({
+            'status': 'error',
+            'message': f'Error processing statement: {str(e)}',
+            'details': traceback.format_exc() if config['DEBUG'] else None
+        }, status_code=500)
+
+
+async def batch_parse_statements(request: Request) -> JSONResponse:
+    """
+    Parse multiple credit card statement PDFs at once
+
+    Expected: multipart/form-data with multiple 'files' field
+
+    Returns: Array of extracted data from all statements
+    """
+    rejected = check_content_length(request)
+    if rejected:
+        return rejected
+
+    try:
+        form = await limit_body(request).form()
+        files = [file for file in form.getlist('files') if hasattr(file, 'filename')]
+
+        if len(files) == 0:
+            return JSONResponse({
+                'status': 'error',
+                'message': 'No files provided. Please upload PDF files.'
+            }, status_code=400)
+
+        results = []
+        errors = []
+
+        for file in files:
+            if not file.filename:
+                continue
+
+            if not allowed_file(file.filename):
+                errors.append({
+                    'filename': file.filename,
+                    'error': 'Invalid file type'
+                })
+                continue
+
+            filepath = None
+            try:
+                filename = secure_filename(file.filename)
+                filepath = await save_upload(file, filename)
+
+                result = await parse_executor.run(parser_service.parse_statement, filepath)
+                results.append({
+                    'filename': filename,
+                    'data': result,
+                    'status': 'success'
+                })
+
+                if config['DELETE_AFTER_PARSE']:
+                    os.remove(filepath)
+
+            except Exception as e:
+                errors.append({
+                    'filename': file.filename,
+                    'error': str(e)
+                })
+                if filepath and os.path.exists(filepath):
+                    os.remove(filepath)
+
+        return JSONResponse({
+            'status': 'success',
+            'parsed_count': len(results),
+            'duplicate_count': sum(1 for result in results if result['data'].get('duplicate_of')),
+            'error_count': len(errors),
+            'results': results,
+            'errors': errors if errors else None,
+            'parsed_at': datetime.now().isoformat()
+        }, status_code=200)
+
+    except BodyTooLarge:
+        return too_large_response()
+
+    except Exception as e:
+        flask_app.logger.error(f"Error in batch parsing: {str(e)}")
+        return JSONResponse({
+            'status': 'error',
+            'message': f'Error processing statements: {str(e)}'
+        }, status_code=500)
+
+
+async def upload_chunk(request: Request) -> JSONResponse:
+    """
+    Upload one chunk of a file (see app.upload_chunk)
+
+    The body is received on the event loop; only the disk write and any
+    decompression run on a worker thread.
+    """
+    upload_id = request.path_params['upload_id']
+
+    try:
+        offset = int(request.query_params.get('offset', request.headers.get('Upload-Offset', 0)))
+    except ValueError:
+        return JSONResponse({
+            'status': 'error',
+            'message': 'Offset must be an integer.'
+        }, status_code=400)
+
+    rejected = check_content_length(request)
+    if rejected:
+        return rejected
+
+    try:
+        body = await read_body(request)
+    except BodyTooLarge:
+        return too_large_response()
+
+    try:
+        session = await run_in_threadpool(
+            upload_manager.write_chunk, upload_id, offset, body,
+            request.headers.get('Content-Encoding')
+        )
+    except UploadError as e:
+        return JSONResponse({
+            'status': 'error',
+            'message': str(e),
+            **e.details
+        }, status_code=e.status_code)
+
+    return JSONResponse({
+        'status': 'success',
+        **session
+    }, status_code=200)
+
+
+async def finalize_upload(request: Request) -> JSONResponse:
+    """
+    Finish an upload and return its parse result (see app.finalize_upload)
+
+    The parse is awaited on the event loop, so waiting clients hold no thread.
+    """
+    upload_id = request.path_params['upload_id']
+
+    try:
+        future = upload_manager.parse_future(upload_id)
+        if future is not None:
+            try:
+                # Shielded: a timeout answers 202 but never cancels the parse itself
+                await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(future)), config['PARSE_TIMEOUT'] or None
+                )
+            except Exception:
+                # Parse errors are recorded on the session and reported by finalize
+                pass
+        session = upload_manager.finalize(upload_id, timeout=0)
+    except UploadError as e:
+        return JSONResponse({
+            'status': 'error',
+            'message': str(e),
+            **e.details
+        }, status_code=e.status_code)
+
+    body, status_code = upload_result(session)
+    return JSONResponse(body, status_code=status_code)
+
+
+async def reextract_statement(request: Request) -> JSONResponse:
+    """Re-extract one stored statement on the parse pool (see app.reextract_statement)"""
+    try:
+        payload = await read_payload(request)
+    except BodyTooLarge:
+        return too_large_response()
+
+    body, status_code = await parse_executor.run(
+        reextract_one, request.path_params['content_hash'], payload.get('issuer') or None,
+        admin_token_valid(request.headers.get('X-Admin-Token'))
+    )
+    return JSONResponse(body, status_code=status_code)
+
+
+async def batch_reextract_statements(request: Request) -> JSONResponse:
+    """Re-extract many stored statements on the parse pool (see app.batch_reextract_statements)"""
+    try:
+        payload = await read_payload(request)
+    except BodyTooLarge:
+        return too_large_response()
+
+    body, status_code = await parse_executor.run(
+        reextract_many, payload, admin_token_valid(request.headers.get('X-Admin-Token'))
+    )
+    return JSONResponse(body, status_code=status_code)
+
+
+async def read_payload(request: Request) -> dict:
+    """Read a JSON or form body as a dict, like Flask's silent get_json/form (empty when unusable)"""
+    content_type = request.headers.get('content-type', '')
+    if content_type.startswith('application/json'):
+        try:
+            payload = json.loads(await read_body(request) or b'null')
+        except ValueError:
+            return {}
+        return payload if isinstance(payload, dict) else {}
+    if content_type.startswith(('multipart/form-data', 'application/x-www-form-urlencoded')):
+        form = await limit_body(request).form()
+        return {key: value for key, value in form.items() if isinstance(value, str)}
+    return {}
+
+
+async def save_upload(file, filename: str) -> str:
+    """Stream an uploaded file to the upload folder and return its path"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    filepath = os.path.join(config['UPLOAD_FOLDER'], f"{timestamp}_{uuid.uuid4().hex[:8]}_{filename}")
+
+    # Disk writes run on worker threads so a slow disk never stalls other requests
+    out = await run_in_threadpool(open, filepath, 'wb')
+    try:
+        while True:
+            chunk = await file.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            await run_in_threadpool(out.write, chunk)
+    finally:
+        await run_in_threadpool(out.close)
+
+    await file.close()
+    return filepath
+
+
+def profile_requested(request: Request) -> bool:
+    """Whether the request asked for a profile (see app.profile_requested)"""
+    flag = request.query_params.get('profile') or request.headers.get('X-Profile', '')
+    return flag.lower() in ('1', 'true', 'yes') and admin_token_valid(request.headers.get('X-Admin-Token'))
+
+
+class BodyTooLarge(Exception):
+    """Raised while reading a request body once it passes MAX_CONTENT_LENGTH"""
+
+
+def check_content_length(request: Request):
+    """
+    Reject a declared Content-Length above MAX_CONTENT_LENGTH before reading the body
+
+    Bodies without the header (chunked transfer) are counted as they are
+    read instead; see limit_body and read_body.
+    """
+    content_length = request.headers.get('content-length')
+    if content_length is None:
+        return None
+
+    try:
+        length = int(content_length)
+    except ValueError:
+        length = -1
+    if length < 0:
+        return JSONResponse({
+            'status': 'error',
+            'message': 'Invalid Content-Length header',
+            'code': 400
+        }, status_code=400)
+
+    max_length = config['MAX_CONTENT_LENGTH']
+    if max_length and length > max_length:
+        return too_large_response()
+    return None
+
+
+def limit_body(request: Request) -> Request:
+    """Wrap a request so reading more than MAX_CONTENT_LENGTH body bytes raises BodyTooLarge"""
+    max_length = config['MAX_CONTENT_LENGTH']
+    if not max_length:
+        return request
+
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        if message['type'] == 'http.request':
+            received += len(message.get('body', b''))
+            if received > max_length:
+                raise BodyTooLarge()
+        return message
+
+    return Request(request.scope, receive)
+
+
+async def read_body(request: Request) -> bytes:
+    """Read the whole request body, stopping with BodyTooLarge once it passes MAX_CONTENT_LENGTH"""
+    max_length = config['MAX_CONTENT_LENGTH']
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if max_length and len(body) > max_length:
+            raise BodyTooLarge()
+    return bytes(body)
+
+
+def too_large_response() -> JSONResponse:
+    """413 response for a request body over MAX_CONTENT_LENGTH"""
+    return JSONResponse({
+        'status': 'error',
+        'message': 'Request body exceeds the maximum upload size',
+        'code': 413
+    }, status_code=413)
+
+
+async def executor_stats(request: Request) -> JSONResponse:
+    """Report parse pool usage"""
+    return JSONResponse({
+        'status': 'success',
+        'executor': parse_executor.stats()
+    }, status_code=200)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Shut the parse pool down cleanly when the server stops"""
+    yield
+    parse_executor.shutdown()
+
+
+app = Starlette(
+    routes=[
+        Route('/api/parse', parse_statement, methods=['POST']),
+        Route('/api/batch-parse', batch_parse_statements, methods=['POST']),
+        Route('/api/uploads/{upload_id}', upload_chunk, methods=['PUT']),
+        Route('/api/uploads/{upload_id}/finalize', finalize_upload, methods=['POST']),
+        Route('/api/reextract/{content_hash}', reextract_statement, methods=['POST']),
+        Route('/api/reextract', batch_reextract_statements, methods=['POST']),
+        Route('/api/executor', executor_stats, methods=['GET']),
+        # Everything else (health, issuers, upload init/status)
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+    ],
+    lifespan=lifespan,
+)
@@ -24,14 +24,63 @@ class Config:
     ALLOWED_EXTENSIONS = {'pdf'}
     DELETE_AFTER_PARSE = os.getenv('DELETE_AFTER_PARSE', 'True').lower() == 'true'
     
+    # Chunked uploads (each chunk request is still capped by MAX_CONTENT_LENGTH)
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 4 * 1024 * 1024))  # suggested to clients
+    MAX_UPLOAD_FILE_SIZE = int(os.getenv('MAX_UPLOAD_FILE_SIZE', 100 * 1024 * 1024))
+    UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', 3600))  # seconds
+    UPLOAD_PARSE_WORKERS = int(os.getenv('UPLOAD_PARSE_WORKERS', 2))
+    
+    # ASGI server (asgi.py): bounded pool for parser calls
+    ASYNC_PARSE_WORKERS = int(os.getenv('ASYNC_PARSE_WORKERS', os.cpu_count() or 2))
+    ASYNC_PARSE_QUEUE = int(os.getenv('ASYNC_PARSE_QUEUE', 0))  # 0 = 4x workers
+    
+    # Parallel uploads suggested to clients by /api/capabilities (0 = ASYNC_PARSE_WORKERS)
+    UPLOAD_CONCURRENCY_HINT = int(os.getenv('UPLOAD_CONCURRENCY_HINT', 0))
+    
+    # Per-parse resource limits (0 disables a limit)
+    MAX_PDF_PAGES = int(os.getenv('MAX_PDF_PAGES', 100))
+    MAX_TEXT_CHARS = int(os.getenv('MAX_TEXT_CHARS', 2_000_000))
+    PARSE_TIMEOUT = float(os.getenv('PARSE_TIMEOUT', 30))  # seconds
+    
+    # Optional subprocess sandbox with a memory cap (POSIX only)
+    SANDBOX_PARSING = os.getenv('SANDBOX_PARSING', 'False').lower() == 'true'
+    SANDBOX_MEMORY_LIMIT_MB = int(os.getenv('SANDBOX_MEMORY_LIMIT_MB', 1024))
+    
+    # Profiling (opt-in): ?profile=1 / X-Profile: 1 on /api/parse, or 1 in N sampled
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+    PROFILE_SAMPLE_RATE = int(os.getenv('PROFILE_SAMPLE_RATE', 0))  # 0 = only on request
+    PROFILER = os.getenv('PROFILER', 'cprofile')  # 'cprofile' or 'pyinstrument'
+    PROFILE_FOLDER = os.getenv('PROFILE_FOLDER', 'profiles')
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 200))
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+    
+    # Extracted text storage (enables re-extraction without re-parsing PDFs); keeps statement contents, so opt-in
+    STORE_EXTRACTED_TEXT = os.getenv('STORE_EXTRACTED_TEXT', 'False').lower() == 'true'
+    TEXT_STORE_FOLDER = os.getenv('TEXT_STORE_FOLDER', 'text_store')
+    TEXT_STORE_RETENTION = int(os.getenv('TEXT_STORE_RETENTION', 7 * 24 * 3600))  # seconds, 0 keeps forever
+    
+    # Near-duplicate detection (summary fields + text sketch); empty path keeps the index in memory
+    DEDUPE_ENABLED = os.getenv('DEDUPE_ENABLED', 'True').lower() == 'true'
+    DUPLICATE_INDEX_PATH = os.getenv('DUPLICATE_INDEX_PATH', '')
+    DUPLICATE_SIMILARITY = float(os.getenv('DUPLICATE_SIMILARITY', 0.9))
+    DUPLICATE_INDEX_MAX_ROWS = int(os.getenv('DUPLICATE_INDEX_MAX_ROWS', 10000))  # 0 = unbounded
+    DUPLICATE_INDEX_RETENTION = int(os.getenv('DUPLICATE_INDEX_RETENTION', 7 * 24 * 3600))  # seconds, 0 keeps forever
+    
     # Parser settings
-    SUPPORTED_ISSUERS = [
-        'Chase',
-        'American Express',
-        'Citibank',
-        'Capital One',
-        'Discover'
+    # Extraction tiers, cheapest first; later tiers only run for fields still missing
+    EXTRACTION_TIERS = [
+        name.strip() for name in os.getenv('EXTRACTION_TIERS', 'pypdf2,pdfplumber,tables').split(',')
+        if name.strip()
     ]
+    # Texts at least this long are tokenized once into a TextIndex (0 disables)
+    TEXT_INDEX_MIN_LENGTH = int(os.getenv('TEXT_INDEX_MIN_LENGTH', 20000))  # characters
+    
+    # Issuer profiles (one JSON/YAML file per issuer), hot-reloaded on change
+    ISSUER_PROFILES_FOLDER = os.getenv(
+        'ISSUER_PROFILES_FOLDER',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'issuers')
+    )
+    ISSUER_RELOAD_INTERVAL = float(os.getenv('ISSUER_RELOAD_INTERVAL', 5))  # seconds, 0 disables
     
     # Data points to extract
     DATA_POINTS = [
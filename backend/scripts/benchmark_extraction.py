@@ -0,0 +1,127 @@
+"""
+Field extraction benchmark: full-text pattern scans vs the TextIndex
+
+Times the extraction pass of PDFParserService (issuer detection, field
+patterns, scoring) over long statements, once rescanning the whole text per
+pattern and once through TextIndex, and checks both produce the same fields.
+
+Synthetic statements are generated in memory: 'summary' has every field on
+page 1, 'sparse' has most summary fields missing, which is what a fallback
+tier or an unfamiliar layout sees and where full scans cost the most.
+PDFs passed on the command line are extracted once and benchmarked too.
+
+Usage:
+    python scripts/benchmark_extraction.py --pages 50 100 200
+    python scripts/benchmark_extraction.py statement.pdf --repeat 20
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.extraction_tiers import ParseLimits  # noqa: E402
+from services.pdf_parser import PDFParserService  # noqa: E402
+from utils.helpers import clean_text  # noqa: E402
+
+MERCHANTS = [
+    'AMAZON MKTPLACE PMTS', 'STARBUCKS STORE 1234', 'UBER TRIP HELP.UBER.COM',
+    'WHOLE FOODS MARKET 10234', 'SHELL OIL 5744', 'NETFLIX.COM', 'PAYMENT THANK YOU',
+]
+
+SUMMARY_LINES = [
+    'Statement Period: 09/01/2024 - 09/30/2024',
+    'Statement Date: 09/30/2024',
+    'Payment Due Date: 10/25/2024',
+    'New Balance: $1,234.56',
+    'Minimum Payment Due: $35.00',
+    'Credit Limit: $10,000.00',
+    'Available Credit: $8,765.44',
+]
+
+
+def synthetic_statement(pages: int, sparse: bool = False, transactions_per_page: int = 45,
+                        seed: int = 0) -> str:
+    """Build the cleaned text of a long transaction-heavy statement"""
+    rng = random.Random(seed)
+    lines = [
+        'Chase Sapphire Card Statement',
+        'Account Holder: John Smith',
+        'Account Number: XXXX XXXX XXXX 4821',
+    ]
+    lines += SUMMARY_LINES[-2:] if sparse else SUMMARY_LINES
+
+    for page in range(2, pages + 1):
+        lines.append(f'Page {page} of {pages} Account Number: XXXX XXXX XXXX 4821')
+        lines.append('Date of Transaction Merchant Name or Transaction Description $ Amount')
+        for _ in range(transactions_per_page):
+            lines.append(
+                f'{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d} {rng.choice(MERCHANTS)} '
+                f'{rng.randint(1, 999)}.{rng.randint(0, 99):02d}'
+            )
+
+    return clean_text('\n'.join(lines))
+
+
+def pdf_text(parser: PDFParserService, filepath: str) -> str:
+    """Extract the longest tier text of a PDF once, as the pipeline would see it"""
+    limits = ParseLimits(0, 0, 0)
+    texts = [parser._run_tier(tier, filepath, limits) for tier in parser.tiers]
+    return max(texts, key=len)
+
+
+def time_extraction(parser: PDFParserService, text: str, repeat: int) -> Tuple[float, Dict]:
+    """Median milliseconds of the extraction pass over text, plus the extracted fields"""
+    stages = [('benchmark', lambda: text)]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data, _ = parser._run_pipeline(stages)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    fields = {field: data[field] for field in ['card_issuer'] + list(parser.FIELDS)}
+    return statistics.median(timings), fields
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdfs', nargs='*', help='Statement PDFs to benchmark in addition to synthetic ones')
+    parser.add_argument('--pages', type=int, nargs='+', default=[50, 100, 200], help='Synthetic statement sizes')
+    parser.add_argument('--repeat', type=int, default=9, help='Runs per document (median is reported)')
+    args = parser.parse_args()
+
+    scan_parser = PDFParserService()
+    index_parser = PDFParserService(index_min_length=1)
+
+    documents: List[Tuple[str, str]] = []
+    for pages in args.pages:
+        documents.append((f'synthetic {pages}p summary', synthetic_statement(pages)))
+        documents.append((f'synthetic {pages}p sparse', synthetic_statement(pages, sparse=True)))
+    for filepath in args.pdfs:
+        documents.append((os.path.basename(filepath), pdf_text(scan_parser, filepath)))
+
+    print(f"{'Document':<30} {'Chars':>9} {'Scan ms':>9} {'Index ms':>9} {'Speedup':>8}  Same")
+    print('-' * 76)
+    mismatches = 0
+    for name, text in documents:
+        scan_ms, scan_fields = time_extraction(scan_parser, text, args.repeat)
+        index_ms, index_fields = time_extraction(index_parser, text, args.repeat)
+        same = scan_fields == index_fields
+        mismatches += not same
+        print(f"{name:<30} {len(text):>9,} {scan_ms:>9.2f} {index_ms:>9.2f} "
+              f"{scan_ms / index_ms if index_ms else 0:>7.1f}x  {'yes' if same else 'NO'}")
+        if not same:
+            for field in scan_fields:
+                if scan_fields[field] != index_fields[field]:
+                    print(f"    {field}: scan={scan_fields[field]!r} index={index_fields[field]!r}")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
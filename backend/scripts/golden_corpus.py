@@ -0,0 +1,480 @@
+"""
+Golden corpus: exact-output and parse-speed gate for PDFParserService
+
+The corpus under golden/ holds synthetic statements for every bundled issuer
+in several layout variants, generated locally by this script (no real
+customer data). Each statement's expected output comes from the values it
+was generated from, not from the parser, so expected.json is ground truth
+for card_issuer and every field in PDFParserService.FIELDS.
+
+'check' parses every statement through parse_statement (configured like the
+app, minus text storage and duplicate detection), compares each field for
+exact equality and times each document. Every field must match, except the
+ones listed in KNOWN_EXCEPTIONS below, each with a reason. golden/baseline.json
+only records the per-document timings of a reference run. The check fails
+when any other field is wrong, a listed exception changes or starts passing,
+or the median parse time regresses by more than --max-regression.
+
+Timings depend on the machine: record the baseline on the machine that runs
+the check (e.g. on the base branch) before comparing a change.
+
+Usage:
+    python scripts/golden_corpus.py generate
+    python scripts/golden_corpus.py check
+    python scripts/golden_corpus.py check --max-regression 0.1 --repeat 9
+    python scripts/golden_corpus.py check --update-baseline
+"""
+
+import argparse
+import calendar
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from services.extraction_tiers import build_tiers  # noqa: E402
+from services.pdf_parser import PDFParserService  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'golden')
+STATEMENTS_DIR = os.path.join(CORPUS_DIR, 'statements')
+EXPECTED_PATH = os.path.join(CORPUS_DIR, 'expected.json')
+BASELINE_PATH = os.path.join(CORPUS_DIR, 'baseline.json')
+
+# Summary line order within a statement
+SUMMARY_ORDER = [
+    'billing_cycle', 'statement_date', 'payment_due_date', 'total_balance',
+    'minimum_payment', 'credit_limit', 'available_credit',
+]
+
+# Per issuer: header line, date format, and line templates for the primary and alternate layouts.
+# Alternate labels exercise secondary issuer patterns or the common fallbacks.
+ISSUER_LAYOUTS = {
+    'Chase': {
+        'header': 'Chase Freedom Unlimited Card Statement',
+        'date_format': '%m/%d/%Y',
+        'primary': {
+            'account_holder': 'Account Holder: {}',
+            'card_last_4_digits': 'Account Number: XXXX XXXX XXXX {}',
+            'billing_cycle': 'Statement Period: {} - {}',
+            'statement_date': 'Statement Date: {}',
+            'payment_due_date': 'Payment Due Date: {}',
+            'total_balance': 'New Balance: ${}',
+            'minimum_payment': 'Minimum Payment Due: ${}',
+            'credit_limit': 'Credit Limit: ${}',
+            'available_credit': 'Available Credit: ${}',
+        },
+        'alternate': {
+            'account_holder': 'Name: {}',
+            'card_last_4_digits': 'Card ending in {}',
+            'statement_date': 'Closing Date: {}',
+            'payment_due_date': 'Due Date: {}',
+            'total_balance': 'Total Balance: ${}',
+        },
+    },
+    'American Express': {
+        'header': 'American Express Gold Card Statement',
+        'date_format': '%m/%d/%Y',
+        'primary': {
+            'account_holder': 'Card Member: {}',
+            'card_last_4_digits': 'Account ending in {}',
+            'billing_cycle': 'Statement Period: {} to {}',
+            'statement_date': 'Statement Date: {}',
+            'payment_due_date': 'Payment Due: {}',
+            'total_balance': 'Total Balance: ${}',
+            'minimum_payment': 'Minimum Payment: ${}',
+            'credit_limit': 'Credit Limit: ${}',
+            'available_credit': 'Available for Purchases: ${}',
+        },
+        'alternate': {
+            'total_balance': 'New Balance: ${}',
+            'payment_due_date': 'Payment Due Date: {}',
+        },
+    },
+    'Capital One': {
+        'header': 'Capital One Quicksilver Statement',
+        'date_format': '%m/%d/%Y',
+        'primary': {
+            'account_holder': 'Account Holder: {}',
+            'card_last_4_digits': 'Account Number: XXXX-XXXX-XXXX-{}',
+            'billing_cycle': 'Statement Period: {} - {}',
+            'statement_date': 'Statement Date: {}',
+            'payment_due_date': 'Payment Due: {}',
+            'total_balance': 'New Balance: ${}',
+            'minimum_payment': 'Minimum Payment: ${}',
+            'credit_limit': 'Credit Limit: ${}',
+            'available_credit': 'Available Credit: ${}',
+        },
+        'alternate': {
+            'account_holder': 'Name: {}',
+            'payment_due_date': 'Payment Due Date: {}',
+            'minimum_payment': 'Min. Payment: ${}',
+        },
+    },
+    'Citibank': {
+        'header': 'Citibank Double Cash Card Statement',
+        'date_format': '%m/%d/%y',
+        'primary': {
+            'account_holder': 'Primary Cardholder: {}',
+            'card_last_4_digits': 'Account Number: ending in {}',
+            'billing_cycle': 'Statement Period: {} - {}',
+            'statement_date': 'Statement Closing Date: {}',
+            'payment_due_date': 'Payment Due Date: {}',
+            'total_balance': 'New Balance: ${}',
+            'minimum_payment': 'Minimum Payment Due: ${}',
+            'credit_limit': 'Credit Limit: ${}',
+            'available_credit': 'Available Credit: ${}',
+        },
+        'alternate': {
+            'billing_cycle': 'Billing Cycle: {} through {}',
+            'credit_limit': 'Total Credit Line: ${}',
+        },
+    },
+    'Discover': {
+        'header': 'Discover it Card Statement',
+        'date_format': '%m/%d/%Y',
+        'primary': {
+            'account_holder': 'Account Holder: {}',
+            'card_last_4_digits': 'Account Number: {}',
+            'billing_cycle': 'Statement Period: {} - {}',
+            'statement_date': 'Statement Closing Date: {}',
+            'payment_due_date': 'Payment Due Date: {}',
+            'total_balance': 'New Balance: ${}',
+            'minimum_payment': 'Minimum Payment: ${}',
+            'credit_limit': 'Credit Limit: ${}',
+            'available_credit': 'Credit Available: ${}',
+        },
+        'alternate': {
+            'total_balance': 'Balance Due: ${}',
+            'statement_date': 'Closing Date: {}',
+        },
+    },
+}
+
+# Layout variant -> (summary position, transaction pages, labels, fields left out, address line)
+VARIANTS = {
+    'summary': ('first', 0, 'primary', (), True),
+    'transactions': ('first', 4, 'primary', (), True),
+    'summary_last': ('last', 3, 'primary', (), True),
+    'alternate': ('first', 2, 'alternate', (), False),
+    'sparse': ('first', 2, 'primary', ('payment_due_date', 'credit_limit', 'available_credit'), True),
+    # Long enough to go through the TextIndex path (TEXT_INDEX_MIN_LENGTH)
+    'long': ('first', 60, 'primary', (), True),
+}
+
+# (document, field) -> (value the parser returns, why it is accepted for now).
+# Keep this empty: fix the parser instead, and only list a field here when the
+# expected output itself cannot be produced yet. Remove entries once they pass.
+KNOWN_EXCEPTIONS: Dict[Tuple[str, str], Tuple[Optional[str], str]] = {}
+
+HOLDERS = ['Jane Doe', 'John Smith', 'Maria Garcia', 'Wei Zhang', 'Priya Patel', 'Samuel Okafor']
+STREETS = ['Evergreen Terrace', 'Maple Avenue', 'Harbor Road', 'Oak Street', 'Cedar Lane']
+MERCHANTS = [
+    'AMAZON MKTPLACE PMTS', 'STARBUCKS STORE', 'UBER TRIP HELP.UBER.COM', 'WHOLE FOODS MARKET',
+    'SHELL OIL', 'NETFLIX.COM', 'TARGET', 'DELTA AIR LINES', 'SPOTIFY USA', 'PAYMENT THANK YOU',
+]
+TRANSACTIONS_PER_PAGE = 40
+
+
+def statement_facts(rng: random.Random) -> Dict[str, Any]:
+    """Pick the values a statement is generated from"""
+    year, month = rng.choice([2023, 2024, 2025]), rng.randint(1, 12)
+    start = date(year, month, 1)
+    end = date(year, month, calendar.monthrange(year, month)[1])
+    credit_limit = rng.choice([2500, 5000, 7500, 10000, 15000, 25000])
+    balance = round(rng.uniform(50, credit_limit * 0.8), 2)
+    return {
+        'holder': rng.choice(HOLDERS),
+        'street': f'{rng.randint(10, 999)} {rng.choice(STREETS)}',
+        'last4': f'{rng.randint(0, 9999):04d}',
+        'start': start,
+        'end': end,
+        'due': end + timedelta(days=25),
+        'total_balance': balance,
+        'minimum_payment': max(35.0, round(balance * 0.02, 2)),
+        'credit_limit': float(credit_limit),
+        'available_credit': round(credit_limit - balance, 2),
+    }
+
+
+def expected_output(issuer: str, facts: Dict[str, Any], omitted: Tuple[str, ...]) -> Dict[str, Optional[str]]:
+    """Fields parse_statement should return for a statement, in its output formats"""
+    expected = {
+        'card_issuer': issuer,
+        'card_last_4_digits': facts['last4'],
+        'billing_cycle': f"{facts['start'].isoformat()} to {facts['end'].isoformat()}",
+        'payment_due_date': facts['due'].isoformat(),
+        'total_balance': f"{facts['total_balance']:.2f}",
+        'minimum_payment': f"{facts['minimum_payment']:.2f}",
+        'statement_date': facts['end'].isoformat(),
+        'account_holder': facts['holder'],
+        'credit_limit': f"{facts['credit_limit']:.2f}",
+        'available_credit': f"{facts['available_credit']:.2f}",
+    }
+    for field in omitted:
+        expected[field] = None
+    return expected
+
+
+def summary_lines(layout: Dict[str, Any], labels: Dict[str, str], facts: Dict[str, Any],
+                  omitted: Tuple[str, ...]) -> List[str]:
+    """Render the summary block of a statement"""
+    fmt = layout['date_format']
+    values = {
+        'billing_cycle': (facts['start'].strftime(fmt), facts['end'].strftime(fmt)),
+        'statement_date': (facts['end'].strftime(fmt),),
+        'payment_due_date': (facts['due'].strftime(fmt),),
+        'total_balance': (f"{facts['total_balance']:,.2f}",),
+        'minimum_payment': (f"{facts['minimum_payment']:,.2f}",),
+        'credit_limit': (f"{facts['credit_limit']:,.2f}",),
+        'available_credit': (f"{facts['available_credit']:,.2f}",),
+    }
+    return [labels[field].format(*values[field]) for field in SUMMARY_ORDER if field not in omitted]
+
+
+def transaction_page(rng: random.Random, facts: Dict[str, Any], page: int, pages: int) -> List[str]:
+    """Render one page of transactions dated within the billing cycle"""
+    lines = [f'Page {page} of {pages}', 'Trans Date Description Amount']
+    for _ in range(TRANSACTIONS_PER_PAGE):
+        day = facts['start'] + timedelta(days=rng.randint(0, (facts['end'] - facts['start']).days))
+        lines.append(f"{day.strftime('%m/%d')} {rng.choice(MERCHANTS)} {rng.randint(1, 499)}.{rng.randint(0, 99):02d}")
+    return lines
+
+
+def build_statement(issuer: str, variant: str) -> Tuple[List[List[str]], Dict[str, Optional[str]]]:
+    """
+    Build the pages of one synthetic statement and its expected output
+
+    Returns:
+        Tuple of (pages as lists of text lines, expected parse_statement fields)
+    """
+    layout = ISSUER_LAYOUTS[issuer]
+    position, transaction_pages, label_set, omitted, address = VARIANTS[variant]
+    labels = dict(layout['primary'], **layout.get(label_set, {}))
+    rng = random.Random(f'{issuer}:{variant}')
+    facts = statement_facts(rng)
+
+    account = [layout['header'], labels['account_holder'].format(facts['holder'].upper())]
+    if address:
+        account.append(facts['street'])
+    account.append(labels['card_last_4_digits'].format(facts['last4']))
+    summary = summary_lines(layout, labels, facts, omitted)
+
+    pages = transaction_pages + 1
+    transactions = [transaction_page(rng, facts, page, pages) for page in range(1, transaction_pages + 1)]
+    if position == 'first':
+        page_lines = [account + summary] + transactions
+    else:
+        page_lines = [account + transactions[0]] + transactions[1:] + [summary] if transactions else [account + summary]
+
+    return page_lines, expected_output(issuer, facts, omitted)
+
+
+def write_pdf(pages: List[List[str]], path: str) -> None:
+    """Write text lines as a minimal multi-page PDF (Helvetica, Flate-compressed, byte-for-byte reproducible)"""
+    def escape(text: str) -> str:
+        return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    page_count = len(pages)
+    # Objects: 1 catalog, 2 page tree, 3 font, then a page and a content stream per page
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        ('<< /Type /Pages /Kids [' + ' '.join(f'{4 + 2 * i} 0 R' for i in range(page_count)) +
+         f'] /Count {page_count} >>').encode(),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    for i, lines in enumerate(pages):
+        content = 'BT /F1 9 Tf 40 760 Td 12 TL\n' + ''.join(f'({escape(line)}) Tj T*\n' for line in lines) + 'ET'
+        stream = zlib.compress(content.encode('latin-1'), 9)
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {5 + 2 * i} 0 R '
+            f'/Resources << /Font << /F1 3 0 R >> >> >>'.encode()
+        )
+        objects.append(f'<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n'.encode() + stream + b'\nendstream')
+
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    out += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def generate() -> None:
+    """Write every statement PDF and expected.json"""
+    os.makedirs(STATEMENTS_DIR, exist_ok=True)
+    documents = {}
+    for issuer in ISSUER_LAYOUTS:
+        for variant in VARIANTS:
+            name = f"{issuer.lower().replace(' ', '_')}_{variant}.pdf"
+            pages, expected = build_statement(issuer, variant)
+            write_pdf(pages, os.path.join(STATEMENTS_DIR, name))
+            documents[name] = {'issuer': issuer, 'variant': variant, 'pages': len(pages), 'expected': expected}
+
+    with open(EXPECTED_PATH, 'w') as f:
+        json.dump({'documents': documents}, f, indent=2)
+        f.write('\n')
+    print(f"Wrote {len(documents)} statements to {os.path.relpath(STATEMENTS_DIR)}")
+
+
+def build_parser() -> PDFParserService:
+    """Parser configured like the app, without text storage or duplicate detection"""
+    return PDFParserService(
+        tiers=build_tiers(Config.EXTRACTION_TIERS),
+        max_pages=Config.MAX_PDF_PAGES,
+        max_chars=Config.MAX_TEXT_CHARS,
+        parse_timeout=Config.PARSE_TIMEOUT,
+        index_min_length=Config.TEXT_INDEX_MIN_LENGTH,
+    )
+
+
+def run_document(parser: PDFParserService, path: str, expected: Dict[str, Optional[str]],
+                 repeat: int) -> Tuple[float, Dict[str, Any]]:
+    """
+    Parse one statement repeat times
+
+    Returns:
+        Tuple of (median milliseconds, {field: actual value} for every field that differs)
+    """
+    timings = []
+    result: Dict[str, Any] = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            result = parser.parse_statement(path)
+        except Exception as e:
+            result = {'error': str(e)}
+        timings.append((time.perf_counter() - start) * 1000)
+
+    mismatches = {
+        field: result.get(field, result.get('error'))
+        for field, value in expected.items()
+        if result.get(field) != value
+    }
+    return statistics.median(timings), mismatches
+
+
+def check(args: argparse.Namespace) -> int:
+    """Run the corpus against expected.json and the baseline; return the exit code"""
+    if not os.path.exists(EXPECTED_PATH):
+        print("No corpus found, run 'generate' first")
+        return 1
+    with open(EXPECTED_PATH) as f:
+        documents = json.load(f)['documents']
+
+    baseline = None
+    if os.path.exists(BASELINE_PATH) and not args.update_baseline:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    base_timings = baseline['documents'] if baseline else {}
+
+    parser = build_parser()
+    results = {}
+    failures = []
+    fixed: List[str] = []
+    correct = total = 0
+
+    print(f"{'Document':<34} {'Pages':>5} {'ms':>9} {'Base ms':>9}  Fields")
+    print('-' * 72)
+    for name, document in documents.items():
+        expected = document['expected']
+        ms, mismatches = run_document(parser, os.path.join(STATEMENTS_DIR, name), expected, args.repeat)
+        results[name] = {'ms': round(ms, 2)}
+        total += len(expected)
+        correct += len(expected) - len(mismatches)
+
+        for field, actual in mismatches.items():
+            exception = KNOWN_EXCEPTIONS.get((name, field))
+            if exception is None:
+                failures.append(f"{name}: {field} expected {expected[field]!r}, got {actual!r}")
+            elif actual != exception[0]:
+                failures.append(f"{name}: {field} changed from {exception[0]!r} to {actual!r} "
+                                f"(expected {expected[field]!r})")
+        fixed += [f"{name}: {field}" for (document, field) in KNOWN_EXCEPTIONS
+                  if document == name and field not in mismatches]
+
+        base_ms = base_timings.get(name, {}).get('ms')
+        print(f"{name:<34} {document['pages']:>5} {ms:>9.2f} {base_ms if base_ms is not None else '-':>9}  "
+              f"{len(expected) - len(mismatches)}/{len(expected)}")
+
+    accuracy = correct / total if total else 0.0
+    median_ms = statistics.median(result['ms'] for result in results.values()) if results else 0.0
+    print('-' * 72)
+    print(f"Accuracy: {correct}/{total} fields ({accuracy:.1%})  Median parse time: {median_ms:.2f} ms")
+
+    if fixed:
+        failures += [f"{line} is correct now; remove it from KNOWN_EXCEPTIONS" for line in fixed]
+
+    if args.update_baseline:
+        if failures:
+            print("\nNot recording a baseline while fields are wrong:")
+            for line in failures:
+                print(f"  {line}")
+            return 1
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump({
+                'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                'machine': f"{platform.python_implementation()} {platform.python_version()} {platform.machine()}",
+                'repeat': args.repeat,
+                'accuracy': round(accuracy, 4),
+                'median_ms': round(median_ms, 2),
+                'documents': results,
+            }, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {os.path.relpath(BASELINE_PATH)}")
+        return 0
+
+    if baseline is None:
+        print("No baseline yet; run with --update-baseline to record timings")
+    elif not args.skip_timing:
+        limit = baseline['median_ms'] * (1 + args.max_regression)
+        print(f"Baseline median: {baseline['median_ms']:.2f} ms (limit {limit:.2f} ms)")
+        if median_ms > limit:
+            failures.append(f"median parse time {median_ms:.2f} ms exceeds baseline "
+                            f"{baseline['median_ms']:.2f} ms by more than {args.max_regression:.0%}")
+
+    if failures:
+        print("\nFAILED:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+
+    print("\nOK")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('generate', help='(Re)write the synthetic statements and expected.json')
+    check_parser = commands.add_parser('check', help='Parse the corpus and compare with expected outputs and baseline')
+    check_parser.add_argument('--repeat', type=int, default=5, help='Parses per document (median is reported)')
+    check_parser.add_argument('--max-regression', type=float, default=0.2,
+                              help='Allowed median slowdown vs the baseline (0.2 = 20%%)')
+    check_parser.add_argument('--skip-timing', action='store_true', help='Only check extracted values')
+    check_parser.add_argument('--update-baseline', action='store_true',
+                              help='Record this run as the new baseline instead of comparing')
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        generate()
+        sys.exit(0)
+    sys.exit(check(args))
+
+
+if __name__ == '__main__':
+    main()
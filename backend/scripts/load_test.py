@@ -0,0 +1,125 @@
+"""
+Slow-upload load test
+
+Opens many connections that trickle a PDF upload to /api/parse, then probes
+the server with fast parse requests while those uploads are in flight.
+A synchronous WSGI deployment ties up one worker per slow client, so probes
+queue behind them; the ASGI app (asgi.py) holds the slow clients on the
+event loop and keeps serving probes.
+
+Usage:
+    gunicorn -w 4 -b 127.0.0.1:5000 app:app      # or: uvicorn asgi:app --port 5000
+    python scripts/load_test.py statement.pdf --url http://127.0.0.1:5000 --slow-clients 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+def build_multipart(pdf_bytes: bytes, filename: str) -> Tuple[bytes, str]:
+    """Build a multipart/form-data body with a single 'file' field"""
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f"Content-Type: application/pdf\r\n\r\n"
+    ).encode() + pdf_bytes + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+async def send_request(host: str, port: int, body: bytes, content_type: str,
+                       trickle_seconds: float = 0, timeout: float = 120) -> Tuple[Optional[int], float]:
+    """
+    POST a body to /api/parse, optionally spreading it over trickle_seconds
+
+    Returns:
+        Tuple of (HTTP status or None on failure, elapsed seconds)
+    """
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        writer.write((
+            f"POST /api/parse HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n"
+        ).encode())
+
+        if trickle_seconds > 0:
+            pieces = 20
+            step = max(1, len(body) // pieces)
+            for offset in range(0, len(body), step):
+                writer.write(body[offset:offset + step])
+                await writer.drain()
+                await asyncio.sleep(trickle_seconds / pieces)
+        else:
+            writer.write(body)
+            await writer.drain()
+
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        writer.close()
+        return int(status_line.split()[1]), time.perf_counter() - start
+    except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+        return None, time.perf_counter() - start
+
+
+async def run(args: argparse.Namespace) -> None:
+    url = urlparse(args.url)
+    host, port = url.hostname, url.port or 80
+
+    with open(args.pdf, 'rb') as file:
+        body, content_type = build_multipart(file.read(), 'statement.pdf')
+
+    # Slow clients trickle their uploads for the whole test window
+    slow = [
+        asyncio.create_task(send_request(host, port, body, content_type, args.slow_seconds))
+        for _ in range(args.slow_clients)
+    ]
+    await asyncio.sleep(1)
+
+    # Probes are ordinary fast uploads issued while the slow clients are connected
+    probe_latencies: List[float] = []
+    probe_failures = 0
+    for _ in range(args.probes):
+        status, elapsed = await send_request(host, port, body, content_type, timeout=args.slow_seconds * 2)
+        if status == 200:
+            probe_latencies.append(elapsed)
+        else:
+            probe_failures += 1
+        await asyncio.sleep(args.probe_interval)
+
+    slow_results = await asyncio.gather(*slow)
+    slow_ok = sum(1 for status, _ in slow_results if status == 200)
+
+    print("=" * 60)
+    print(f"Target:            {args.url}")
+    print(f"Slow clients:      {args.slow_clients} ({slow_ok} completed with 200)")
+    print(f"Probe requests:    {len(probe_latencies)} ok, {probe_failures} failed")
+    if probe_latencies:
+        probe_latencies.sort()
+        p95 = probe_latencies[min(len(probe_latencies) - 1, int(len(probe_latencies) * 0.95))]
+        print(f"Probe latency p50: {statistics.median(probe_latencies) * 1000:.1f} ms")
+        print(f"Probe latency p95: {p95 * 1000:.1f} ms")
+    print("=" * 60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdf', help='Statement PDF to upload')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='Server base URL')
+    parser.add_argument('--slow-clients', type=int, default=100, help='Concurrent slow uploads')
+    parser.add_argument('--slow-seconds', type=float, default=20, help='Time each slow upload takes')
+    parser.add_argument('--probes', type=int, default=10, help='Fast parse requests to time')
+    parser.add_argument('--probe-interval', type=float, default=0.5, help='Seconds between probes')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+"""
+Duplicate Index Service
+SQLite index of statement fingerprints for near-duplicate detection across uploads
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, Optional
+import logging
+
+from utils.fingerprint import (
+    MIN_SHINGLES, SKETCH_SIZE, SUMMARY_FIELDS,
+    sketch_bands, sketch_similarity, summary_conflicts, summary_key, text_sketch
+)
+
+
+class DuplicateIndex:
+    """
+    Finds earlier parses of the same statement by summary key or text sketch
+
+    Lookups never scan the table: rows with the same summary key are found
+    through its index, and sketch candidates only come from rows sharing a
+    band hash (locality-sensitive hashing), so cost stays flat as the archive
+    grows. ``path`` may be ':memory:' (per process) or a file shared by workers.
+
+    Rows hold parse results, so the index is bounded: rows older than
+    ``retention`` seconds are never returned and are deleted on the next
+    insert, and beyond ``max_rows`` the least recently matched rows go first.
+    0 disables either bound.
+    """
+
+    # Bumped when the table layout changes; older index files are rebuilt empty
+    SCHEMA_VERSION = 4
+
+    def __init__(self, path: str = ':memory:', threshold: float = 0.9, bands: int = 8,
+                 max_rows: int = 0, retention: float = 0):
+        if SKETCH_SIZE % bands:
+            raise ValueError(f"bands must divide the sketch size ({SKETCH_SIZE})")
+
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.max_rows = max_rows
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def fingerprint(self, data: Dict[str, Any], text: str, version: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the fingerprint of a statement
+
+        Args:
+            data: Extracted statement data (summary fields may be None)
+            text: Cleaned statement text
+            version: Version of the extraction rules (issuer matcher version);
+                results stored under another version are never returned
+
+        Returns:
+            Fingerprint dict for find() and add()
+        """
+        sketch, shingles = text_sketch(text)
+        return {
+            'version': version,
+            'issuer': data.get('card_issuer'),
+            'summary': {field: data.get(field) for field in SUMMARY_FIELDS},
+            'summary_key': summary_key(data),
+            'sketch': sketch,
+            'shingles': shingles,
+        }
+
+    def find(self, fingerprint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Look up an earlier statement matching a fingerprint
+
+        A match needs the same extraction rules version and issuer, no
+        disagreeing summary field and a
+        sketch similarity of at least ``threshold``. A shared summary key
+        only finds the candidate; it is never enough on its own, since
+        unrelated statements can share last 4, date and balance (e.g. 0.00).
+        Texts too short for a trustworthy sketch never match.
+
+        Args:
+            fingerprint: Fingerprint from fingerprint()
+
+        Returns:
+            Dict with 'content_hash', 'matched_on' ('summary' when the summary
+            keys are equal, else 'sketch'), 'similarity' and the stored
+            'result', or None when the statement is new
+        """
+        if fingerprint['shingles'] < MIN_SHINGLES:
+            return None
+
+        columns = 's.id, s.content_hash, s.summary_key, s.summary, s.sketch, s.result'
+        scope = [fingerprint['version'], fingerprint['issuer'], self._cutoff()]
+        with self._lock:
+            conn = self._connection()
+
+            candidates = []
+            if fingerprint['summary_key']:
+                candidates += conn.execute(
+                    f'SELECT {columns} FROM statements s '
+                    'WHERE s.summary_key = ? AND s.version IS ? AND s.issuer IS ? AND s.created >= ?',
+                    [fingerprint['summary_key']] + scope
+                ).fetchall()
+
+            bands = sketch_bands(fingerprint['sketch'], self.bands)
+            candidates += conn.execute(
+                f'SELECT DISTINCT {columns} '
+                'FROM bands b JOIN statements s ON s.id = b.statement_id '
+                'WHERE s.version IS ? AND s.issuer IS ? AND s.created >= ? AND (' +
+                ' OR '.join(['(b.band = ? AND b.bucket = ?)'] * len(bands)) + ')',
+                scope + [value for band, bucket in enumerate(bands) for value in (band, bucket)]
+            ).fetchall()
+
+        best = None
+        for row_id, content_hash, key, summary, sketch, result in candidates:
+            if summary_conflicts(fingerprint['summary'], json.loads(summary)):
+                continue
+            similarity = self._similarity(fingerprint, sketch)
+            if similarity >= self.threshold and (best is None or similarity > best[2]):
+                matched_on = 'summary' if key and key == fingerprint['summary_key'] else 'sketch'
+                best = (row_id, content_hash, similarity, result, matched_on)
+
+        if best is None:
+            return None
+
+        # Matched rows are the last to be evicted by max_rows
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('UPDATE statements SET used = ? WHERE id = ?', (time.time(), best[0]))
+        return self._match(best[1], best[4], best[2], best[3])
+
+    def add(self, fingerprint: Dict[str, Any], content_hash: Optional[str], result: Dict[str, Any]) -> None:
+        """
+        Record a parsed statement so later copies can be recognised
+
+        Args:
+            fingerprint: Fingerprint from fingerprint()
+            content_hash: Content hash of the parsed file
+            result: Parse result returned for later duplicates
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                cursor = conn.execute(
+                    'INSERT INTO statements '
+                    '(content_hash, version, issuer, summary_key, summary, sketch, result, created, used) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (
+                        content_hash,
+                        fingerprint['version'],
+                        fingerprint['issuer'],
+                        fingerprint['summary_key'],
+                        json.dumps(fingerprint['summary']),
+                        fingerprint['sketch'].tobytes(),
+                        json.dumps(result),
+                        now,
+                        now,
+                    )
+                )
+                if fingerprint['shingles'] >= MIN_SHINGLES:
+                    conn.executemany(
+                        'INSERT INTO bands (band, bucket, statement_id) VALUES (?, ?, ?)',
+                        [
+                            (band, bucket, cursor.lastrowid)
+                            for band, bucket in enumerate(sketch_bands(fingerprint['sketch'], self.bands))
+                        ]
+                    )
+                self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Delete expired rows, then the least recently used ones beyond max_rows (caller holds the lock)"""
+        doomed = []
+        if self.retention:
+            doomed += conn.execute('SELECT id FROM statements WHERE created < ?', (self._cutoff(),)).fetchall()
+        if self.max_rows:
+            doomed += conn.execute(
+                'SELECT id FROM statements ORDER BY used DESC LIMIT -1 OFFSET ?', (self.max_rows,)
+            ).fetchall()
+        if doomed:
+            conn.executemany('DELETE FROM bands WHERE statement_id = ?', doomed)
+            conn.executemany('DELETE FROM statements WHERE id = ?', doomed)
+
+    def _cutoff(self) -> float:
+        """Creation time before which rows have expired (0 when rows never expire)"""
+        return time.time() - self.retention if self.retention else 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return index size and matching settings"""
+        with self._lock:
+            count = self._connection().execute('SELECT COUNT(*) FROM statements').fetchone()[0]
+        return {
+            'statements': count,
+            'threshold': self.threshold,
+            'bands': self.bands,
+            'sketch_size': SKETCH_SIZE,
+            'max_rows': self.max_rows,
+            'retention': self.retention,
+            'path': self.path,
+        }
+
+    def _similarity(self, fingerprint: Dict[str, Any], stored_sketch: bytes) -> float:
+        """Sketch similarity between a fingerprint and a stored sketch"""
+        sketch = array('I')
+        sketch.frombytes(stored_sketch)
+        return round(sketch_similarity(fingerprint['sketch'], sketch), 3)
+
+    def _match(self, content_hash: str, matched_on: str, similarity: float, result: str) -> Dict[str, Any]:
+        """Build the find() result for a stored row"""
+        return {
+            'content_hash': content_hash,
+            'matched_on': matched_on,
+            'similarity': similarity,
+            'result': json.loads(result),
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open (or reopen after a fork) the SQLite connection and create the schema"""
+        if self._conn is not None and self._pid == os.getpid():
+            return self._conn
+
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        if self.path != ':memory:':
+            # Let several workers read while one writes
+            conn.execute('PRAGMA journal_mode=WAL')
+        if conn.execute('PRAGMA user_version').fetchone()[0] != self.SCHEMA_VERSION:
+            # The index is a cache of parse results: rebuild it rather than migrate
+            self.logger.info(f"Rebuilding duplicate index {self.path} (schema v{self.SCHEMA_VERSION})")
+            conn.executescript(
+                'DROP TABLE IF EXISTS statements;'
+                'DROP TABLE IF EXISTS bands;'
+                f'PRAGMA user_version = {self.SCHEMA_VERSION};'
+            )
+        conn.executescript(
+            'CREATE TABLE IF NOT EXISTS statements ('
+            '  id INTEGER PRIMARY KEY, content_hash TEXT, version TEXT, issuer TEXT, summary_key TEXT, summary TEXT,'
+            '  sketch BLOB, result TEXT, created REAL, used REAL);'
+            'CREATE INDEX IF NOT EXISTS idx_statements_summary ON statements (summary_key);'
+            'CREATE INDEX IF NOT EXISTS idx_statements_created ON statements (created);'
+            'CREATE INDEX IF NOT EXISTS idx_statements_used ON statements (used);'
+            'CREATE TABLE IF NOT EXISTS bands (band INTEGER, bucket INTEGER, statement_id INTEGER);'
+            'CREATE INDEX IF NOT EXISTS idx_bands_bucket ON bands (band, bucket);'
+            'CREATE INDEX IF NOT EXISTS idx_bands_statement ON bands (statement_id);'
+        )
+        self._conn = conn
+        self._pid = os.getpid()
+        return conn
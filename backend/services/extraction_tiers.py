@@ -0,0 +1,172 @@
+"""
+Extraction Tiers
+Text extraction stages for the tiered parsing pipeline, ordered cheapest first
+"""
+
+import time
+from typing import Dict, List, Optional, Type
+
+import pdfplumber
+import PyPDF2
+
+
+class ParseLimitExceeded(ValueError):
+    """Raised when a PDF exceeds a configured per-parse resource limit"""
+
+
+class ParseLimits:
+    """
+    Resource limits for a single parse, shared by every tier that runs
+
+    A limit of 0 disables that check. Page and time checks happen between
+    pages; the character limit applies to each tier's text separately, since
+    every tier re-extracts the same document.
+    """
+
+    def __init__(self, max_pages: int = 0, max_chars: int = 0, timeout: float = 0):
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.chars = 0
+
+    def page_range(self) -> Optional[range]:
+        """Page numbers to load (1-based); one extra page so overflow is detectable"""
+        return range(1, self.max_pages + 2) if self.max_pages else None
+
+    def check_pages(self, page_count: int) -> None:
+        """Fail if the document has more pages than allowed"""
+        if self.max_pages and page_count > self.max_pages:
+            raise ParseLimitExceeded(f"PDF has more than {self.max_pages} pages")
+
+    def check_time(self) -> None:
+        """Fail if the parse has run past its deadline"""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ParseLimitExceeded(f"Parsing took longer than {self.timeout:g} seconds")
+
+    def start_tier(self) -> None:
+        """Reset the character count before a tier extracts the document again"""
+        self.chars = 0
+
+    def add_chars(self, count: int) -> None:
+        """Count characters extracted by the current tier and fail once they exceed the limit"""
+        self.chars += count
+        if self.max_chars and self.chars > self.max_chars:
+            raise ParseLimitExceeded(f"PDF produced more than {self.max_chars} characters of text")
+
+
+class ExtractionTier:
+    """
+    Base class for a text extraction tier
+
+    Subclasses set a unique ``name`` and implement ``extract_text``. The parser
+    runs tiers in order and only moves on to the next tier for fields that are
+    still missing.
+    """
+
+    name = 'base'
+
+    def extract_text(self, filepath: str, limits: ParseLimits) -> str:
+        """
+        Extract raw text from a PDF
+
+        Args:
+            filepath: Path to the PDF file
+            limits: Resource limits for the current parse
+
+        Returns:
+            Raw (uncleaned) text
+        """
+        raise NotImplementedError
+
+
+class PyPDF2TextTier(ExtractionTier):
+    """Tier 1: fast text extraction with PyPDF2"""
+
+    name = 'pypdf2'
+
+    def extract_text(self, filepath: str, limits: ParseLimits) -> str:
+        parts = []
+        with open(filepath, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            limits.check_pages(len(pdf_reader.pages))
+            for page in pdf_reader.pages:
+                limits.check_time()
+                page_text = page.extract_text()
+                if page_text:
+                    limits.add_chars(len(page_text))
+                    parts.append(page_text)
+        return "\n".join(parts)
+
+
+class PdfplumberTextTier(ExtractionTier):
+    """Tier 2: layout-aware text extraction with pdfplumber"""
+
+    name = 'pdfplumber'
+
+    def extract_text(self, filepath: str, limits: ParseLimits) -> str:
+        parts = []
+        with pdfplumber.open(filepath, pages=limits.page_range()) as pdf:
+            limits.check_pages(len(pdf.pages))
+            for page in pdf.pages:
+                limits.check_time()
+                page_text = page.extract_text()
+                # Release the page's layout objects before moving on
+                page.close()
+                if page_text:
+                    limits.add_chars(len(page_text))
+                    parts.append(page_text)
+        return "\n".join(parts)
+
+
+class PdfplumberTableTier(ExtractionTier):
+    """Tier 3: table extraction with pdfplumber, one table row per line"""
+
+    name = 'tables'
+
+    def extract_text(self, filepath: str, limits: ParseLimits) -> str:
+        lines = []
+        with pdfplumber.open(filepath, pages=limits.page_range()) as pdf:
+            limits.check_pages(len(pdf.pages))
+            for page in pdf.pages:
+                limits.check_time()
+                tables = page.extract_tables()
+                # Release the page's layout objects before moving on
+                page.close()
+                for table in tables:
+                    for row in table:
+                        cells = [cell.strip() for cell in row if cell and cell.strip()]
+                        if cells:
+                            # "New Balance | $1,234.56" becomes "New Balance $1,234.56"
+                            line = ' '.join(cells)
+                            limits.add_chars(len(line))
+                            lines.append(line)
+        return "\n".join(lines)
+
+
+# Tier name -> tier class, used to build the pipeline from configuration
+TIER_CLASSES: Dict[str, Type[ExtractionTier]] = {
+    PyPDF2TextTier.name: PyPDF2TextTier,
+    PdfplumberTextTier.name: PdfplumberTextTier,
+    PdfplumberTableTier.name: PdfplumberTableTier,
+}
+
+DEFAULT_TIERS = [PyPDF2TextTier.name, PdfplumberTextTier.name, PdfplumberTableTier.name]
+
+
+def build_tiers(names: List[str]) -> List[ExtractionTier]:
+    """
+    Instantiate extraction tiers by name, in pipeline order
+
+    Args:
+        names: Tier names (keys of TIER_CLASSES)
+
+    Returns:
+        List of tier instances
+    """
+    tiers = []
+    for name in names:
+        if name not in TIER_CLASSES:
+            raise ValueError(f"Unknown extraction tier: {name}")
+        tiers.append(TIER_CLASSES[name]())
+    return tiers
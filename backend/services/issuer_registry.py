@@ -0,0 +1,206 @@
+"""
+Issuer Registry Service
+Loads issuer profiles from data files and compiles them into an in-memory matcher
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+import logging
+
+from utils.patterns import COMMON_PATTERNS, PATTERN_FLAGS
+
+try:
+    import yaml
+except ImportError:  # YAML profiles are optional; JSON always works
+    yaml = None
+
+
+PROFILE_EXTENSIONS = ('.json', '.yaml', '.yml')
+
+
+class IssuerMatcher:
+    """
+    Compiled, read-only snapshot of all issuer profiles
+
+    A parse grabs one matcher and uses it throughout, so a reload that swaps
+    in a new matcher never changes patterns under an in-flight request.
+    """
+
+    def __init__(self, profiles: List[Dict[str, Any]], source_files: List[str]):
+        start = time.perf_counter()
+
+        self.profiles = sorted(profiles, key=lambda profile: profile.get('priority', 100))
+        self.issuers = [profile['name'] for profile in self.profiles]
+
+        # One alternation over every keyword; the group name maps a hit back to its issuer.
+        # Keywords match whole words only, so 'chase' does not fire on 'Purchases'.
+        alternatives = []
+        self._group_issuers = {}
+        for index, profile in enumerate(self.profiles):
+            keywords = [rf"(?<!\w){re.escape(keyword)}(?!\w)" for keyword in profile.get('keywords', [])]
+            if keywords:
+                group = f"issuer_{index}"
+                self._group_issuers[group] = (profile['name'], index)
+                alternatives.append(f"(?P<{group}>{'|'.join(keywords)})")
+        self._detector = re.compile('|'.join(alternatives), re.IGNORECASE) if alternatives else None
+
+        self._patterns: Dict[str, Dict[str, List[Pattern]]] = {}
+        for profile in self.profiles:
+            self._patterns[profile['name']] = {
+                field: [re.compile(pattern, PATTERN_FLAGS) for pattern in field_patterns]
+                for field, field_patterns in profile.get('patterns', {}).items()
+            }
+        self._layout_hints = {
+            profile['name']: profile.get('layout_hints', {}) for profile in self.profiles
+        }
+
+        # Identifies what these profiles (plus the common fallbacks) extract; cached results are keyed by it
+        self.version = hashlib.sha256(
+            json.dumps([self.profiles, COMMON_PATTERNS], sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()[:16]
+
+        self.stats = {
+            'issuers': len(self.issuers),
+            'keywords': sum(len(profile.get('keywords', [])) for profile in self.profiles),
+            'patterns': sum(
+                len(field_patterns)
+                for fields in self._patterns.values()
+                for field_patterns in fields.values()
+            ),
+            'source_files': source_files,
+            'version': self.version,
+            'compile_ms': round((time.perf_counter() - start) * 1000, 2),
+            'loaded_at': datetime.now().isoformat(),
+        }
+
+    def identify(self, text: str) -> str:
+        """
+        Identify the issuer with the best (lowest) priority whose keywords appear in the text
+
+        Args:
+            text: Cleaned statement text
+
+        Returns:
+            Issuer name, or 'Unknown'
+        """
+        if not self._detector:
+            return 'Unknown'
+
+        best_issuer = None
+        best_rank = len(self.issuers)
+        for match in self._detector.finditer(text):
+            issuer, rank = self._group_issuers[match.lastgroup]
+            if rank < best_rank:
+                best_issuer, best_rank = issuer, rank
+                if rank == 0:
+                    break
+
+        return best_issuer or 'Unknown'
+
+    def get_patterns(self, issuer: str, field: str) -> List[Pattern]:
+        """Return the compiled issuer-specific patterns for a field"""
+        return self._patterns.get(issuer, {}).get(field, [])
+
+    def get_layout_hints(self, issuer: str) -> Dict[str, Any]:
+        """Return layout hints for an issuer (e.g. 'skip_tiers')"""
+        return self._layout_hints.get(issuer, {})
+
+
+class IssuerRegistry:
+    """Loads issuer profiles from a folder and hot-reloads them when files change"""
+
+    def __init__(self, folder: str, reload_interval: float = 5.0):
+        self.logger = logging.getLogger(__name__)
+        self.folder = folder
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._signature = None
+        self._last_check = 0.0
+        self._matcher = None
+        self.reload(force=True)
+
+    @property
+    def matcher(self) -> IssuerMatcher:
+        """Current matcher, reloading first if profile files changed"""
+        if self.reload_interval > 0 and time.monotonic() - self._last_check >= self.reload_interval:
+            self.reload()
+        return self._matcher
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Recompile profiles if files changed (or always when forced)
+
+        A bad profile file leaves the previous matcher in place.
+
+        Args:
+            force: Reload even if no file changed
+
+        Returns:
+            True if a new matcher was swapped in
+        """
+        with self._lock:
+            self._last_check = time.monotonic()
+            signature = self._scan()
+            if not force and signature == self._signature:
+                return False
+
+            try:
+                profiles = [self._load_profile(path) for path, _, _ in signature]
+                matcher = IssuerMatcher(profiles, [os.path.basename(path) for path, _, _ in signature])
+            except Exception as e:
+                if self._matcher is None:
+                    raise
+                self.logger.error(f"Issuer profile reload failed, keeping previous profiles: {e}")
+                return False
+
+            # Single reference assignment: readers see either the old or the new matcher
+            self._matcher = matcher
+            self._signature = signature
+            self.logger.info(
+                f"Loaded {matcher.stats['issuers']} issuer profiles "
+                f"({matcher.stats['patterns']} patterns) in {matcher.stats['compile_ms']} ms"
+            )
+            return True
+
+    def _scan(self) -> Tuple[Tuple[str, int, int], ...]:
+        """Return (path, mtime, size) for every profile file, used to detect changes"""
+        entries = []
+        for name in sorted(os.listdir(self.folder)):
+            if name.lower().endswith(PROFILE_EXTENSIONS):
+                path = os.path.join(self.folder, name)
+                stat = os.stat(path)
+                entries.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def _load_profile(self, path: str) -> Dict[str, Any]:
+        """Read and validate a single profile file"""
+        with open(path, 'r', encoding='utf-8') as file:
+            if path.lower().endswith('.json'):
+                profile = json.load(file)
+            elif yaml is not None:
+                profile = yaml.safe_load(file)
+            else:
+                raise ValueError(f"PyYAML is required to load {os.path.basename(path)}")
+
+        if not isinstance(profile, dict) or not profile.get('name'):
+            raise ValueError(f"Issuer profile {os.path.basename(path)} must define a 'name'")
+        if not isinstance(profile.get('patterns', {}), dict):
+            raise ValueError(f"Issuer profile {profile['name']} has invalid 'patterns'")
+
+        return profile
+
+
+def default_profiles_folder() -> str:
+    """Return the issuer profiles folder shipped with the backend"""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'issuers')
+
+
+def create_registry(folder: Optional[str] = None, reload_interval: float = 5.0) -> IssuerRegistry:
+    """Build an issuer registry, defaulting to the bundled profiles folder"""
+    return IssuerRegistry(folder or default_profiles_folder(), reload_interval)
@@ -0,0 +1,66 @@
+"""
+Parse Executor Service
+Offloads blocking parser calls from async request handlers to a bounded thread pool
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+
+class ParseExecutor:
+    """
+    Bounded thread pool for CPU-heavy parser work called from an event loop
+
+    At most ``max_workers`` parses run at once and at most ``max_pending``
+    are admitted (running or queued); further callers wait without holding
+    a thread, so slow or idle connections cost only event-loop memory.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 0):
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 4
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='parse')
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a blocking callable on the pool and await its result
+
+        Args:
+            fn: Blocking callable (e.g. PDFParserService.parse_statement)
+            *args: Positional arguments for fn
+
+        Returns:
+            The callable's return value
+        """
+        if self._semaphore is None:
+            # Created lazily so it binds to the server's running loop
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, partial(fn, *args))
+            finally:
+                self._in_flight -= 1
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The underlying pool, for synchronous code that must share the same worker cap"""
+        return self._executor
+
+    def stats(self) -> Dict[str, int]:
+        """Return pool size, admission bound and current admitted count"""
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'in_flight': self._in_flight,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the pool, waiting for running parses to finish"""
+        self._executor.shutdown(wait=True)
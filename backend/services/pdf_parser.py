@@ -3,259 +3,346 @@ PDF Parser Service
 Handles extraction of data from credit card statements
 """
 
+import hashlib
 import re
-import pdfplumber
-import PyPDF2
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Pattern, Tuple
 import logging
 
-from utils.patterns import ISSUER_PATTERNS, COMMON_PATTERNS
+from utils.patterns import COMPILED_COMMON_PATTERNS, NAME_STOP_WORDS
 from utils.helpers import clean_text, extract_amount, parse_date
+from utils.confidence import score_extraction
+from utils.text_index import FIELD_VALUE_KINDS, TextIndex
+from services.text_store import TextStore, compute_content_hash
+from services.duplicate_index import DuplicateIndex
+from services.extraction_tiers import (
+    ExtractionTier, ParseLimitExceeded, ParseLimits, DEFAULT_TIERS, build_tiers
+)
+from services.issuer_registry import IssuerMatcher, IssuerRegistry, create_registry
 
 
 class PDFParserService:
     """Service for parsing credit card statement PDFs"""
     
-    def __init__(self):
+    # Bump whenever extraction code changes what a statement parses to (formatters,
+    # utils/helpers date/amount parsing, tier text handling); stored duplicate results
+    # from older versions are then never reused
+    PARSER_VERSION = 2
+    
+    # Output field -> (pattern key in issuer profiles / COMMON_PATTERNS, formatter method)
+    FIELDS = {
+        'card_last_4_digits': ('card_number', '_format_card_number'),
+        'billing_cycle': ('billing_cycle', '_format_billing_cycle'),
+        'payment_due_date': ('due_date', '_format_date'),
+        'total_balance': ('total_balance', '_format_amount'),
+        'minimum_payment': ('minimum_payment', '_format_amount'),
+        'statement_date': ('statement_date', '_format_date'),
+        'account_holder': ('account_holder', '_format_name'),
+        'credit_limit': ('credit_limit', '_format_amount'),
+        'available_credit': ('available_credit', '_format_amount'),
+    }
+    
+    def __init__(self, text_store: Optional[TextStore] = None,
+                 tiers: Optional[List[ExtractionTier]] = None,
+                 issuer_registry: Optional[IssuerRegistry] = None,
+                 max_pages: int = 0, max_chars: int = 0, parse_timeout: float = 0,
+                 index_min_length: int = 0, duplicate_index: Optional[DuplicateIndex] = None):
         self.logger = logging.getLogger(__name__)
-        self.supported_issuers = [
-            'Chase',
-            'American Express',
-            'Citibank',
-            'Capital One',
-            'Discover'
-        ]
+        self.text_store = text_store
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.parse_timeout = parse_timeout
+        # Texts at least this long are indexed once instead of rescanned per pattern (0 disables)
+        self.index_min_length = index_min_length
+        self.duplicate_index = duplicate_index
+        self.tiers = tiers if tiers is not None else build_tiers(DEFAULT_TIERS)
+        self.issuer_registry = issuer_registry if issuer_registry is not None else create_registry()
     
     def get_supported_issuers(self) -> List[str]:
         """Return list of supported credit card issuers"""
-        return self.supported_issuers
+        return list(self.issuer_registry.matcher.issuers)
     
-    def parse_statement(self, filepath: str, issuer_hint: Optional[str] = None) -> Dict[str, Any]:
+    def parse_statement(self, filepath: str, issuer_hint: Optional[str] = None,
+                        matcher: Optional[IssuerMatcher] = None) -> Dict[str, Any]:
         """
         Parse a credit card statement PDF and extract key data points
         
+        Extraction tiers run cheapest first; each later tier only runs when
+        fields are still missing after the previous ones. Page, character and
+        wall-clock limits apply to the parse as a whole. With a duplicate
+        index, the first tier's text is fingerprinted and a copy of an
+        already parsed statement returns that statement's result right away.
+        
         Args:
             filepath: Path to the PDF file
             issuer_hint: Optional hint about which issuer (for optimization)
+            matcher: Issuer profile snapshot to use (default: the registry's current one)
         
         Returns:
             Dictionary containing extracted data points
         """
         try:
-            # Extract text from PDF
-            text = self._extract_text_from_pdf(filepath)
+            # Use one matcher snapshot for the whole parse, even if profiles reload meanwhile
+            matcher = matcher or self.issuer_registry.matcher
+            limits = ParseLimits(self.max_pages, self.max_chars, self.parse_timeout)
+            stages = [
+                (tier.name, lambda tier=tier: self._run_tier(tier, filepath, limits))
+                for tier in self.tiers
+            ]
+            duplicate = {}
+            early_exit = None
+            if self.duplicate_index is not None:
+                # Results extracted by other code, tiers, issuer profiles or patterns are never reused
+                version = self.result_version(matcher)
+                
+                def early_exit(partial_data, text):
+                    # Fingerprint the first useful text; skip the remaining tiers for a known statement
+                    duplicate['fingerprint'] = self.duplicate_index.fingerprint(partial_data, text, version)
+                    duplicate['match'] = self.duplicate_index.find(duplicate['fingerprint'])
+                    return duplicate['match'] is not None
             
-            if not text or len(text.strip()) < 50:
-                raise ValueError("Unable to extract text from PDF or PDF is empty")
+            data, texts = self._run_pipeline(stages, issuer_hint, early_exit, matcher)
             
-            # Identify the issuer
-            issuer = issuer_hint if issuer_hint else self._identify_issuer(text)
+            if duplicate.get('match'):
+                match = duplicate['match']
+                result = match['result']
+                result['duplicate_of'] = {
+                    'content_hash': match['content_hash'],
+                    'matched_on': match['matched_on'],
+                    'similarity': match['similarity'],
+                }
+                return result
             
-            # Extract data points
-            data = {
-                'card_issuer': issuer,
-                'card_last_4_digits': self._extract_card_number(text, issuer),
-                'billing_cycle': self._extract_billing_cycle(text, issuer),
-                'payment_due_date': self._extract_due_date(text, issuer),
-                'total_balance': self._extract_total_balance(text, issuer),
-                'minimum_payment': self._extract_minimum_payment(text, issuer),
-                'statement_date': self._extract_statement_date(text, issuer),
-                'account_holder': self._extract_account_holder(text, issuer),
-                'credit_limit': self._extract_credit_limit(text, issuer),
-                'available_credit': self._extract_available_credit(text, issuer)
-            }
+            content_hash = None
+            if self.text_store or self.duplicate_index is not None:
+                content_hash = compute_content_hash(filepath)
+            if self.text_store:
+                # Keep the cleaned text so pattern updates can be re-applied later
+                self.text_store.save(content_hash, texts)
+            data['content_hash'] = content_hash
             
-            # Add metadata
-            data['extraction_confidence'] = self._calculate_confidence(data)
-            data['raw_text_length'] = len(text)
+            if duplicate.get('fingerprint'):
+                self.duplicate_index.add(duplicate['fingerprint'], content_hash, data)
             
             return data
             
+        except ParseLimitExceeded as e:
+            self.logger.warning(f"Parse limit exceeded: {str(e)}")
+            raise
         except Exception as e:
             self.logger.error(f"Error parsing PDF: {str(e)}")
             raise Exception(f"Failed to parse statement: {str(e)}")
     
-    def _extract_text_from_pdf(self, filepath: str) -> str:
-        """Extract text from PDF using multiple methods"""
-        text = ""
+    def reextract(self, content_hash: str, issuer_hint: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Re-run issuer detection and field extraction over previously stored text
         
-        # Try pdfplumber first (better for complex layouts)
-        try:
-            with pdfplumber.open(filepath) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-        except Exception as e:
-            self.logger.warning(f"pdfplumber extraction failed: {e}")
+        Only the tiers that ran during the original parse have stored text, so
+        no PDF extraction happens here.
         
-        # Fallback to PyPDF2 if pdfplumber fails
-        if not text or len(text.strip()) < 50:
-            try:
-                with open(filepath, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-            except Exception as e:
-                self.logger.error(f"PyPDF2 extraction also failed: {e}")
+        Args:
+            content_hash: Content hash returned by an earlier parse
+            issuer_hint: Optional hint about which issuer (for optimization)
         
-        return clean_text(text)
-    
-    def _identify_issuer(self, text: str) -> str:
-        """Identify the credit card issuer from the text"""
-        text_lower = text.lower()
+        Returns:
+            Dictionary containing extracted data points
+        """
+        if not self.text_store:
+            raise ValueError("Text storage is not enabled")
         
-        # Check for issuer-specific keywords
-        if any(keyword in text_lower for keyword in ['chase', 'jpmorgan']):
-            return 'Chase'
-        elif any(keyword in text_lower for keyword in ['american express', 'amex']):
-            return 'American Express'
-        elif any(keyword in text_lower for keyword in ['citibank', 'citi card']):
-            return 'Citibank'
-        elif any(keyword in text_lower for keyword in ['capital one']):
-            return 'Capital One'
-        elif any(keyword in text_lower for keyword in ['discover']):
-            return 'Discover'
+        texts = self.text_store.load(content_hash)
+        if texts is None:
+            raise KeyError(f"No stored text for content hash {content_hash}")
         
-        return 'Unknown'
-    
-    def _extract_card_number(self, text: str, issuer: str) -> Optional[str]:
-        """Extract last 4 digits of card number"""
-        patterns = ISSUER_PATTERNS.get(issuer, {}).get('card_number', [])
-        patterns.extend(COMMON_PATTERNS['card_number'])
+        # Replay stored texts in pipeline order, then any tiers no longer configured
+        order = [tier.name for tier in self.tiers]
+        names = [name for name in order if name in texts]
+        names += [name for name in texts if name not in order]
+        stages = [(name, lambda name=name: texts[name]) for name in names]
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-            if match:
-                # Extract just the last 4 digits
-                card_num = match.group(1) if match.groups() else match.group(0)
-                digits = re.findall(r'\d+', card_num)
-                if digits:
-                    last_4 = ''.join(digits)[-4:]
-                    return last_4
+        data, _ = self._run_pipeline(stages, issuer_hint)
+        data['content_hash'] = content_hash
         
-        return None
+        return data
     
-    def _extract_billing_cycle(self, text: str, issuer: str) -> Optional[str]:
-        """Extract billing cycle dates"""
-        patterns = ISSUER_PATTERNS.get(issuer, {}).get('billing_cycle', [])
-        patterns.extend(COMMON_PATTERNS['billing_cycle'])
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-            if match:
-                if match.groups():
-                    start = match.group(1)
-                    end = match.group(2) if len(match.groups()) > 1 else match.group(1)
-                    return f"{parse_date(start)} to {parse_date(end)}"
-                return match.group(0)
-        
-        return None
+    def get_stored_hashes(self) -> List[str]:
+        """Return content hashes of all statements with stored text"""
+        if not self.text_store:
+            return []
+        return list(self.text_store.iter_hashes())
     
-    def _extract_due_date(self, text: str, issuer: str) -> Optional[str]:
-        """Extract payment due date"""
-        patterns = ISSUER_PATTERNS.get(issuer, {}).get('due_date', [])
-        patterns.extend(COMMON_PATTERNS['due_date'])
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-            if match:
-                date_str = match.group(1) if match.groups() else match.group(0)
-                return parse_date(date_str)
+    def _run_pipeline(self, stages: List[Tuple[str, Callable[[], str]]],
+                      issuer_hint: Optional[str] = None,
+                      early_exit: Optional[Callable[[Dict[str, Any], str], bool]] = None,
+                      matcher: Optional[IssuerMatcher] = None
+                      ) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Run text stages in order, extracting only fields earlier stages missed
         
-        return None
-    
-    def _extract_total_balance(self, text: str, issuer: str) -> Optional[str]:
-        """Extract total balance amount"""
-        patterns = ISSUER_PATTERNS.get(issuer, {}).get('total_balance', [])
-        patterns.extend(COMMON_PATTERNS['total_balance'])
+        Args:
+            stages: (tier name, callable returning cleaned text) pairs, cheapest first
+            issuer_hint: Optional hint about which issuer (for optimization)
+            early_exit: Optional check called once with (data, text) after the first
+                stage that yields text; returning True skips the remaining stages
+            matcher: Issuer profile snapshot to use (default: the registry's current one)
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-            if match:
-                amount = match.group(1) if match.groups() else match.group(0)
-                return extract_amount(amount)
+        Returns:
+            Tuple of (extracted data, cleaned text of every stage that ran)
+        """
+        # Use one matcher snapshot for the whole parse, even if profiles reload meanwhile
+        matcher = matcher or self.issuer_registry.matcher
         
-        return None
-    
-    def _extract_minimum_payment(self, text: str, issuer: str) -> Optional[str]:
-        """Extract minimum payment amount"""
-        patterns = ISSUER_PATTERNS.get(issuer, {}).get('minimum_payment', [])
-        patterns.extend(COMMON_PATTERNS['minimum_payment'])
+        # Identify the issuer from the hint up front; otherwise from the first useful text
+        if issuer_hint:
+            issuer, issuer_source = issuer_hint, 'hint'
+        else:
+            issuer, issuer_source = 'Unknown', None
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-            if match:
-                amount = match.group(1) if match.groups() else match.group(0)
-                return extract_amount(amount)
+        data = {'card_issuer': issuer}
+        sources = {'card_issuer': issuer_source}
+        data.update({field: None for field in self.FIELDS})
+        texts = {}
+        timings = {}
         
-        return None
-    
-    def _extract_statement_date(self, text: str, issuer: str) -> Optional[str]:
-        """Extract statement date"""
-        patterns = ISSUER_PATTERNS.get(issuer, {}).get('statement_date', [])
-        patterns.extend(COMMON_PATTERNS['statement_date'])
+        for name, get_text in stages:
+            missing = [field for field in self.FIELDS if data[field] is None]
+            if texts and not missing:
+                break
+            if issuer != 'Unknown' and name in matcher.get_layout_hints(issuer).get('skip_tiers', []):
+                continue
+            
+            start = time.perf_counter()
+            text = get_text()
+            texts[name] = text
+            
+            if text:
+                if issuer == 'Unknown':
+                    issuer = self._identify_issuer(text, matcher)
+                    issuer_source = 'keyword' if issuer != 'Unknown' else None
+                    data['card_issuer'], sources['card_issuer'] = issuer, issuer_source
+                
+                # Long statements are tokenized once; patterns then only scan label windows
+                index = None
+                if self.index_min_length and len(text) >= self.index_min_length:
+                    index = TextIndex(text)
+                
+                # Extract data points, remembering which pattern tier produced each one
+                for field in missing:
+                    data[field], sources[field] = self._extract_field(text, issuer, field, matcher, index)
+            
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+            
+            if text and early_exit is not None:
+                if early_exit(data, text):
+                    break
+                early_exit = None
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-            if match:
-                date_str = match.group(1) if match.groups() else match.group(0)
-                return parse_date(date_str)
+        longest = max((len(text) for text in texts.values()), default=0)
+        if longest < 50:
+            raise ValueError("Unable to extract text from PDF or PDF is empty")
         
-        return None
-    
-    def _extract_account_holder(self, text: str, issuer: str) -> Optional[str]:
-        """Extract account holder name"""
-        patterns = ISSUER_PATTERNS.get(issuer, {}).get('account_holder', [])
-        patterns.extend(COMMON_PATTERNS['account_holder'])
+        # Score from the recorded tiers and cross-field checks (no extra text pass)
+        confidence = score_extraction(data, sources)
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-            if match:
-                name = match.group(1) if match.groups() else match.group(0)
-                return clean_text(name).title()
+        # Add metadata
+        data['extraction_confidence'] = confidence['level']
+        data['confidence_score'] = confidence['score']
+        data['field_confidence'] = confidence['field_scores']
+        data['validation_issues'] = [issue['message'] for issue in confidence['issues']]
+        data['raw_text_length'] = longest
+        data['extraction_tier'] = list(timings)[-1]
+        data['tier_timings_ms'] = timings
         
-        return None
+        return data, texts
+    
+    def result_version(self, matcher: IssuerMatcher) -> str:
+        """Identify everything that determines a parse result: parser code, tiers and issuer profiles"""
+        parts = [str(self.PARSER_VERSION), ','.join(tier.name for tier in self.tiers), matcher.version]
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:16]
     
-    def _extract_credit_limit(self, text: str, issuer: str) -> Optional[str]:
-        """Extract credit limit"""
-        patterns = ISSUER_PATTERNS.get(issuer, {}).get('credit_limit', [])
-        patterns.extend(COMMON_PATTERNS['credit_limit'])
+    def _run_tier(self, tier: ExtractionTier, filepath: str, limits: ParseLimits) -> str:
+        """Run one extraction tier and clean its text, treating failures as empty text"""
+        limits.start_tier()
+        try:
+            return clean_text(tier.extract_text(filepath, limits))
+        except ParseLimitExceeded:
+            raise
+        except Exception as e:
+            self.logger.warning(f"{tier.name} extraction failed: {e}")
+            return ""
+    
+    def _identify_issuer(self, text: str, matcher: IssuerMatcher) -> str:
+        """Identify the credit card issuer from the text"""
+        return matcher.identify(text)
+    
+    def _get_patterns(self, matcher: IssuerMatcher, issuer: str, field: str) -> List[Tuple[str, Pattern]]:
+        """Return (tier, compiled pattern) pairs: issuer-specific patterns first, then common ones"""
+        issuer_patterns = matcher.get_patterns(issuer, field)
+        return ([('issuer', pattern) for pattern in issuer_patterns] +
+                [('common', pattern) for pattern in COMPILED_COMMON_PATTERNS[field]])
+    
+    def _extract_field(self, text: str, issuer: str, field: str, matcher: IssuerMatcher,
+                       index: Optional[TextIndex] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Extract a single data point, trying issuer-specific patterns before common ones
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-            if match:
-                amount = match.group(1) if match.groups() else match.group(0)
-                return extract_amount(amount)
+        Args:
+            text: Cleaned statement text
+            issuer: Identified card issuer
+            field: Output field name (key of FIELDS)
+            matcher: Issuer profile snapshot for this parse
+            index: Optional TextIndex over text; patterns then only scan label windows
         
-        return None
-    
-    def _extract_available_credit(self, text: str, issuer: str) -> Optional[str]:
-        """Extract available credit"""
-        patterns = ISSUER_PATTERNS.get(issuer, {}).get('available_credit', [])
-        patterns.extend(COMMON_PATTERNS['available_credit'])
+        Returns:
+            Tuple of (formatted value, pattern tier that matched) or (None, None)
+        """
+        pattern_key, formatter_name = self.FIELDS[field]
+        formatter = getattr(self, formatter_name)
+        value_kind = FIELD_VALUE_KINDS.get(pattern_key)
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+        for tier, pattern in self._get_patterns(matcher, issuer, pattern_key):
+            match = index.search(pattern, value_kind) if index else pattern.search(text)
             if match:
-                amount = match.group(1) if match.groups() else match.group(0)
-                return extract_amount(amount)
+                value = formatter(match)
+                if value is not None:
+                    return value, tier
         
+        return None, None
+    
+    def _format_card_number(self, match: re.Match) -> Optional[str]:
+        """Format last 4 digits of card number"""
+        card_num = match.group(1) if match.groups() else match.group(0)
+        digits = re.findall(r'\d+', card_num)
+        if digits:
+            return ''.join(digits)[-4:]
         return None
     
-    def _calculate_confidence(self, data: Dict[str, Any]) -> str:
-        """Calculate extraction confidence based on how many fields were found"""
-        total_fields = len([k for k in data.keys() if not k.startswith('_')])
-        extracted_fields = len([v for v in data.values() if v is not None and v != 'Unknown'])
-        
-        confidence_ratio = extracted_fields / total_fields if total_fields > 0 else 0
-        
-        if confidence_ratio >= 0.8:
-            return 'high'
-        elif confidence_ratio >= 0.5:
-            return 'medium'
-        else:
-            return 'low'
+    def _format_billing_cycle(self, match: re.Match) -> Optional[str]:
+        """Format billing cycle dates"""
+        if match.groups():
+            start = match.group(1)
+            end = match.group(2) if len(match.groups()) > 1 else match.group(1)
+            return f"{parse_date(start)} to {parse_date(end)}"
+        return match.group(0)
+    
+    def _format_date(self, match: re.Match) -> Optional[str]:
+        """Format a date field (payment due date, statement date)"""
+        date_str = match.group(1) if match.groups() else match.group(0)
+        return parse_date(date_str)
+    
+    def _format_amount(self, match: re.Match) -> Optional[str]:
+        """Format a monetary field (balance, payment, limit, credit)"""
+        amount = match.group(1) if match.groups() else match.group(0)
+        return extract_amount(amount)
+    
+    def _format_name(self, match: re.Match) -> Optional[str]:
+        """Format account holder name"""
+        name = match.group(1) if match.groups() else match.group(0)
+        words = clean_text(name).split(' ')
+        # Drop the label that follows the name in flattened text (e.g. "Jane Doe Card Ending In")
+        for position, word in enumerate(words):
+            if word.rstrip('.').lower() in NAME_STOP_WORDS:
+                words = words[:position]
+                break
+        return ' '.join(words).title() or None
@@ -0,0 +1,166 @@
+"""
+Profiling Service
+Captures on-demand or sampled profiles of parser calls and stores them locally
+"""
+
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import threading
+import time
+import uuid
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:  # The sampling profiler is optional; cProfile always works
+    SamplingProfiler = None
+
+
+class ProfilingService:
+    """
+    Runs selected parser calls under a profiler and keeps the artifacts
+
+    'cprofile' mode stores a pstats dump (.prof) plus a text summary (.txt);
+    'pyinstrument' mode stores an HTML report (.html) when pyinstrument is
+    installed. Only one profile is captured at a time; calls that arrive
+    while a profile is running simply run unprofiled. Calls whose work runs
+    in a child process (SandboxedParser) are profiled inside that child.
+    """
+
+    def __init__(self, folder: str, enabled: bool = False, sample_rate: int = 0,
+                 mode: str = 'cprofile', max_files: int = 200):
+        self.logger = logging.getLogger(__name__)
+        self.folder = folder
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self.mode = mode
+        if mode == 'pyinstrument' and SamplingProfiler is None:
+            self.logger.warning("pyinstrument is not installed; falling back to cProfile")
+            self.mode = 'cprofile'
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(self.folder, exist_ok=True)
+
+    def should_profile(self, requested: bool = False) -> bool:
+        """
+        Decide whether this call gets profiled
+
+        Args:
+            requested: The caller explicitly asked for a profile
+
+        Returns:
+            True when profiling is enabled and the call was requested or sampled
+        """
+        if not self.enabled:
+            return False
+        if requested:
+            return True
+        return self.sample_rate > 0 and next(self._counter) % self.sample_rate == 0
+
+    def call(self, requested: bool, fn: Callable[..., Any], *args: Any,
+             label: str = '', isolated: bool = False) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """
+        Call fn, profiling it when requested or sampled
+
+        Args:
+            requested: The caller explicitly asked for a profile
+            fn: Callable to run (e.g. PDFParserService.parse_statement)
+            *args: Positional arguments for fn
+            label: Short description stored with the profile (e.g. filename)
+            isolated: fn does its work in a child process and accepts a 'wrapper'
+                to run there (SandboxedParser.parse_statement); the profiler is
+                handed over so the profile covers the child, not this process waiting on it
+
+        Returns:
+            Tuple of (fn result, profile info or None)
+        """
+        if not self.should_profile(requested) or not self._lock.acquire(blocking=False):
+            return fn(*args), None
+
+        try:
+            profile_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+            start = time.perf_counter()
+            run = partial(self._run_sampling if self.mode == 'pyinstrument' else self._run_cprofile,
+                          profile_id, label)
+            if isolated:
+                result, filename = fn(*args, wrapper=run)
+            else:
+                result, filename = run(fn, *args)
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        finally:
+            self._lock.release()
+
+        self._prune()
+        return result, {
+            'id': profile_id,
+            'file': filename,
+            'mode': self.mode,
+            'sampled': not requested,
+            'elapsed_ms': elapsed_ms,
+        }
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Return stored profile artifacts, newest first"""
+        if not os.path.isdir(self.folder):
+            return []
+
+        profiles = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                profiles.append({
+                    'file': name,
+                    'size': stat.st_size,
+                    'created_at': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                })
+        return sorted(profiles, key=lambda profile: profile['created_at'], reverse=True)
+
+    def _run_cprofile(self, profile_id: str, label: str, fn: Callable[..., Any],
+                      *args: Any) -> Tuple[Any, str]:
+        """Deterministic profile; writes a pstats dump and a cumulative-time summary"""
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(fn, *args)
+        finally:
+            profiler.dump_stats(os.path.join(self.folder, f"{profile_id}.prof"))
+
+            summary = io.StringIO()
+            summary.write(f"Profile {profile_id} {label}\n\n")
+            pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(40)
+            with open(os.path.join(self.folder, f"{profile_id}.txt"), 'w', encoding='utf-8') as file:
+                file.write(summary.getvalue())
+
+        return result, f"{profile_id}.prof"
+
+    def _run_sampling(self, profile_id: str, label: str, fn: Callable[..., Any],
+                      *args: Any) -> Tuple[Any, str]:
+        """Sampling profile with pyinstrument; writes an HTML report"""
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            result = fn(*args)
+        finally:
+            profiler.stop()
+            with open(os.path.join(self.folder, f"{profile_id}.html"), 'w', encoding='utf-8') as file:
+                file.write(profiler.output_html())
+
+        return result, f"{profile_id}.html"
+
+    def _prune(self) -> None:
+        """Delete the oldest artifacts beyond max_files"""
+        if not self.max_files:
+            return
+        for profile in self.list_profiles()[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.folder, profile['file']))
+            except OSError:
+                pass
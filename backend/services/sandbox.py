@@ -0,0 +1,202 @@
+"""
+Sandboxed Parser Service
+Runs each parse in a child process with a memory cap and a hard timeout
+"""
+
+import multiprocessing
+import time
+from typing import Any, Callable, Dict, Optional
+import logging
+
+from services.extraction_tiers import ParseLimitExceeded
+from services.issuer_registry import IssuerMatcher
+from services.pdf_parser import PDFParserService
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Seconds between checks of the child's resident memory
+MEMORY_POLL_INTERVAL = 0.05
+
+
+def process_memory_kb(pid: Any, field: str) -> Optional[int]:
+    """
+    Read a memory figure (e.g. 'VmRSS', 'VmSize') of a process from /proc
+
+    Args:
+        pid: Process id, or 'self'
+
+    Returns:
+        Size in kB, or None where /proc is unavailable (e.g. macOS) or the process is gone
+    """
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class _ParentDuplicateIndex:
+    """
+    Duplicate index stand-in for the child process
+
+    A forked child's copy of the index (especially an in-memory one) dies with
+    the child, so lookups and inserts are sent to the parent over the pipe.
+    Fingerprints are pure computation and stay in the child.
+    """
+
+    def __init__(self, conn, index):
+        self.conn = conn
+        self.index = index
+
+    def fingerprint(self, data: Dict[str, Any], text: str, version: Optional[str] = None) -> Dict[str, Any]:
+        return self.index.fingerprint(data, text, version)
+
+    def find(self, fingerprint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        self.conn.send(('find', fingerprint))
+        return self.conn.recv()
+
+    def add(self, fingerprint: Dict[str, Any], content_hash: Optional[str], result: Dict[str, Any]) -> None:
+        self.conn.send(('add', (fingerprint, content_hash, result)))
+
+
+def _sandbox_worker(conn, parser: PDFParserService, matcher: IssuerMatcher, filepath: str,
+                    issuer_hint: Optional[str], memory_limit_mb: int,
+                    wrapper: Optional[Callable[..., Any]]) -> None:
+    """Child process entry point: cap memory, parse, send the outcome back"""
+    try:
+        if memory_limit_mb:
+            # The fork starts with the parent's whole footprint; the limit is on top of it.
+            # The parent enforces it on resident memory; the address-space cap (twice the limit,
+            # since allocators reserve more address space than they touch) is a backstop
+            # against single huge allocations, which RSS polling could miss.
+            conn.send(('baseline', process_memory_kb('self', 'VmRSS')))
+            size_kb = process_memory_kb('self', 'VmSize')
+            if size_kb is not None and resource is not None:
+                limit = (size_kb + 2 * memory_limit_mb * 1024) * 1024
+                resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+        if parser.duplicate_index is not None:
+            # Only this child's copy of the parser is changed
+            parser.duplicate_index = _ParentDuplicateIndex(conn, parser.duplicate_index)
+
+        if wrapper is not None:
+            conn.send(('ok', wrapper(parser.parse_statement, filepath, issuer_hint, matcher)))
+        else:
+            conn.send(('ok', parser.parse_statement(filepath, issuer_hint, matcher)))
+    except MemoryError:
+        conn.send(('limit', f"Parsing exceeded the {memory_limit_mb} MB memory limit"))
+    except ParseLimitExceeded as e:
+        conn.send(('limit', str(e)))
+    except Exception as e:
+        conn.send(('error', str(e)))
+    finally:
+        conn.close()
+
+
+class SandboxedParser:
+    """
+    Drop-in wrapper that runs PDFParserService.parse_statement in a child process
+
+    The child is forked so it inherits the already-loaded parser without
+    re-importing anything. The parent kills it once its resident memory grows
+    more than the limit past what it inherited (read from /proc), or after the
+    timeout, so a hostile PDF only takes down its own process. The issuer
+    matcher is snapshotted in the parent: the child never touches the
+    registry's lock, which another thread may have held at fork time.
+    Duplicate index lookups and inserts from the child are served by the
+    parent, so the index outlives each child. Falls back to in-process parsing
+    where fork or resource limits are unavailable (e.g. Windows).
+    """
+
+    def __init__(self, parser: PDFParserService, memory_limit_mb: int = 512, timeout: float = 60):
+        self.logger = logging.getLogger(__name__)
+        self.parser = parser
+        self.memory_limit_mb = memory_limit_mb
+        self.timeout = timeout
+        self.available = resource is not None and 'fork' in multiprocessing.get_all_start_methods()
+        if not self.available:
+            self.logger.warning("Sandboxed parsing is unavailable on this platform; parsing in-process")
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything except parse_statement goes straight to the wrapped parser
+        if name == 'parser':
+            raise AttributeError(name)
+        return getattr(self.parser, name)
+
+    def parse_statement(self, filepath: str, issuer_hint: Optional[str] = None,
+                        wrapper: Optional[Callable[..., Any]] = None) -> Any:
+        """
+        Parse a statement in a memory-capped child process
+
+        Args:
+            filepath: Path to the PDF file
+            issuer_hint: Optional hint about which issuer (for optimization)
+            wrapper: Optional wrapper(fn, *args) run in the child in place of the
+                parse call (e.g. a profiler); its return value is returned instead
+
+        Returns:
+            Dictionary containing extracted data points (or the wrapper's return value)
+        """
+        if not self.available:
+            if wrapper is not None:
+                return wrapper(self.parser.parse_statement, filepath, issuer_hint)
+            return self.parser.parse_statement(filepath, issuer_hint)
+
+        matcher = self.parser.issuer_registry.matcher
+        context = multiprocessing.get_context('fork')
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=_sandbox_worker,
+            args=(child_conn, self.parser, matcher, filepath, issuer_hint, self.memory_limit_mb, wrapper),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        baseline_kb = None
+        try:
+            while True:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if baseline_kb is not None:
+                    remaining = MEMORY_POLL_INTERVAL if remaining is None else min(remaining, MEMORY_POLL_INTERVAL)
+                if not parent_conn.poll(remaining):
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise ParseLimitExceeded(f"Parsing took longer than {self.timeout:g} seconds")
+                    rss_kb = process_memory_kb(process.pid, 'VmRSS')
+                    if rss_kb is not None and rss_kb - baseline_kb > self.memory_limit_mb * 1024:
+                        raise ParseLimitExceeded(f"Parsing exceeded the {self.memory_limit_mb} MB memory limit")
+                    continue
+                status, payload = parent_conn.recv()
+
+                # Memory baseline and duplicate index requests from the child; anything else is the outcome
+                if status == 'baseline':
+                    baseline_kb = payload
+                elif status == 'find':
+                    parent_conn.send(self.parser.duplicate_index.find(payload))
+                elif status == 'add':
+                    self.parser.duplicate_index.add(*payload)
+                else:
+                    break
+        except EOFError:
+            # The child died without reporting back (e.g. killed by the OS)
+            raise ParseLimitExceeded(
+                f"Parser process exited unexpectedly (memory limit {self.memory_limit_mb} MB)"
+            )
+        finally:
+            parent_conn.close()
+            if process.is_alive():
+                process.kill()
+            process.join()
+
+        if status == 'ok':
+            return payload
+        if status == 'limit':
+            raise ParseLimitExceeded(payload)
+        raise Exception(payload)
@@ -0,0 +1,170 @@
+"""
+Text Store Service
+Persists extracted statement text so fields can be re-extracted without re-parsing the PDF
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, Optional
+import logging
+
+
+def compute_content_hash(filepath: str) -> str:
+    """
+    Compute the SHA-256 hash of a file's contents
+
+    Args:
+        filepath: Path to the file
+
+    Returns:
+        Hex digest identifying the file contents
+    """
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def valid_content_hash(content_hash: Optional[str]) -> bool:
+    """Check that a string is a hex SHA-256 digest"""
+    return (
+        isinstance(content_hash, str) and len(content_hash) == 64
+        and all(c in '0123456789abcdef' for c in content_hash.lower())
+    )
+
+
+class TextStore:
+    """
+    Compressed on-disk store of cleaned statement text, keyed by content hash
+
+    Each entry maps extraction tier name -> cleaned text for the tiers that ran.
+    Entries older than ``retention`` seconds are treated as gone and purged
+    (at most once per ``PURGE_INTERVAL`` on save); 0 keeps them forever.
+    """
+
+    EXTENSION = '.txt.z'
+    PURGE_INTERVAL = 60  # seconds
+
+    def __init__(self, folder: str, compression_level: int = 6, retention: float = 0):
+        self.logger = logging.getLogger(__name__)
+        self.folder = folder
+        self.compression_level = compression_level
+        self.retention = retention
+        self._last_purge = 0.0
+        self._purge_lock = threading.Lock()
+        os.makedirs(self.folder, exist_ok=True)
+
+    def save(self, content_hash: str, texts: Dict[str, str]) -> None:
+        """Store tier texts for a content hash, replacing any previous entry atomically"""
+        self._maybe_purge()
+        payload = zlib.compress(json.dumps(texts).encode('utf-8'), self.compression_level)
+
+        # Write to a temp file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(payload)
+            os.replace(tmp_path, self._path(content_hash))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, content_hash: str) -> Optional[Dict[str, str]]:
+        """Return stored tier texts for a content hash, or None if it is not stored"""
+        path = self._path(content_hash)
+        if not os.path.exists(path):
+            return None
+        if self._expired(path):
+            self._remove(path)
+            return None
+
+        with open(path, 'rb') as file:
+            payload = zlib.decompress(file.read()).decode('utf-8')
+
+        try:
+            texts = json.loads(payload)
+        except ValueError:
+            texts = None
+        if not isinstance(texts, dict):
+            # Entries written before tiered extraction hold a single plain text
+            texts = {'text': payload}
+        return texts
+
+    def contains(self, content_hash: str) -> bool:
+        """Check whether unexpired text is stored for a content hash"""
+        path = self._path(content_hash)
+        return os.path.exists(path) and not self._expired(path)
+
+    def delete(self, content_hash: str) -> bool:
+        """Remove a stored entry, returning True if one existed"""
+        path = self._path(content_hash)
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
+
+    def iter_hashes(self) -> Iterator[str]:
+        """Yield the content hash of every unexpired entry"""
+        for name in sorted(os.listdir(self.folder)):
+            if name.endswith(self.EXTENSION) and not self._expired(os.path.join(self.folder, name)):
+                yield name[:-len(self.EXTENSION)]
+
+    def purge_expired(self) -> int:
+        """
+        Delete entries older than the retention period
+
+        Returns:
+            Number of entries removed
+        """
+        if not self.retention:
+            return 0
+
+        removed = 0
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if name.endswith(self.EXTENSION) and self._expired(path):
+                removed += self._remove(path)
+        if removed:
+            self.logger.info(f"Purged {removed} expired text store entries")
+        return removed
+
+    def _maybe_purge(self) -> None:
+        """Run purge_expired at most once per PURGE_INTERVAL"""
+        if not self.retention:
+            return
+        with self._purge_lock:
+            now = time.time()
+            if now - self._last_purge < self.PURGE_INTERVAL:
+                return
+            self._last_purge = now
+        self.purge_expired()
+
+    def _expired(self, path: str) -> bool:
+        """Whether an entry is past the retention period"""
+        if not self.retention:
+            return False
+        try:
+            return time.time() - os.path.getmtime(path) > self.retention
+        except OSError:
+            return True
+
+    def _remove(self, path: str) -> bool:
+        """Delete an entry file, tolerating a concurrent delete"""
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _path(self, content_hash: str) -> str:
+        """Build the storage path for a content hash"""
+        if not valid_content_hash(content_hash):
+            raise ValueError(f"Invalid content hash: {content_hash}")
+        return os.path.join(self.folder, f"{content_hash.lower()}{self.EXTENSION}")
@@ -0,0 +1,393 @@
+"""
+Upload Manager Service
+Resumable chunked uploads with compressed bodies, content-hash dedup and early parsing
+"""
+
+import hashlib
+import hmac
+import io
+import os
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import logging
+
+from services.text_store import compute_content_hash
+
+try:
+    import zstandard
+except ImportError:  # zstd bodies are optional; gzip always works
+    zstandard = None
+
+
+class UploadError(Exception):
+    """Raised for invalid upload requests; carries the HTTP status to return"""
+
+    def __init__(self, message: str, status_code: int = 400, **details: Any):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details
+
+
+def supported_encodings() -> list:
+    """Return the Content-Encoding values accepted for chunk bodies"""
+    return ['identity', 'gzip'] + (['zstd'] if zstandard is not None else [])
+
+
+def decode_body(data: bytes, encoding: Optional[str], max_size: int) -> bytes:
+    """
+    Decompress a chunk body, refusing to inflate beyond max_size bytes
+
+    Args:
+        data: Raw request body
+        encoding: Content-Encoding header value (None, 'identity', 'gzip' or 'zstd')
+        max_size: Maximum decompressed size allowed for this chunk
+
+    Returns:
+        Decompressed bytes
+    """
+    encoding = (encoding or 'identity').strip().lower()
+
+    if encoding == 'identity':
+        decoded = data
+    elif encoding == 'gzip':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            decoded = decompressor.decompress(data, max_size + 1)
+        except zlib.error as e:
+            raise UploadError(f"Invalid gzip body: {e}")
+    elif encoding == 'zstd' and zstandard is not None:
+        try:
+            reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+            decoded = reader.read(max_size + 1)
+        except zstandard.ZstdError as e:
+            raise UploadError(f"Invalid zstd body: {e}")
+    else:
+        raise UploadError(
+            f"Unsupported Content-Encoding: {encoding}",
+            status_code=415,
+            supported_encodings=supported_encodings()
+        )
+
+    if len(decoded) > max_size:
+        raise UploadError("Chunk extends past the declared file size", status_code=413)
+    return decoded
+
+
+class UploadSession:
+    """State of a single chunked upload"""
+
+    def __init__(self, upload_id: str, filename: str, size: int, path: str,
+                 content_hash: Optional[str] = None, issuer_hint: Optional[str] = None):
+        self.upload_id = upload_id
+        self.filename = filename
+        self.size = size
+        self.path = path
+        self.content_hash = content_hash
+        self.issuer_hint = issuer_hint
+        self.received = 0
+        self.status = 'uploading'
+        self.result = None
+        self.error = None
+        self.future: Optional[Future] = None
+        self.updated_at = time.time()
+        self.lock = threading.Lock()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public view of the session for API responses"""
+        return {
+            'upload_id': self.upload_id,
+            'filename': self.filename,
+            'size': self.size,
+            'offset': self.received,
+            'content_hash': self.content_hash,
+            'upload_status': self.status,
+            'error': self.error,
+        }
+
+
+class UploadManager:
+    """
+    Tracks chunked uploads and parses each file as soon as its last chunk lands
+
+    Completed results are cached by content hash, so a file that was already
+    parsed (or whose text is in the text store) is not parsed again. The
+    cache is only consulted once the server has hashed the uploaded bytes:
+    a client-declared hash alone never unlocks a stored result.
+
+    With a ``receipt_secret``, finalize also returns a receipt, an HMAC of the
+    verified content hash. A client that later presents the hash together
+    with that receipt proves it uploaded those bytes before, so init_upload
+    skips the upload and returns the known result.
+    """
+
+    def __init__(self, folder: str, parse_fn: Callable[[str, Optional[str]], Dict[str, Any]],
+                 reextract_fn: Optional[Callable[[str, Optional[str]], Dict[str, Any]]] = None,
+                 max_workers: int = 2, max_file_size: int = 0, session_ttl: float = 3600,
+                 delete_after_parse: bool = True, result_cache_size: int = 1000,
+                 receipt_secret: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.folder = folder
+        self.receipt_secret = receipt_secret.encode('utf-8') if receipt_secret else None
+        self.parse_fn = parse_fn
+        self.reextract_fn = reextract_fn
+        self.max_file_size = max_file_size
+        self.session_ttl = session_ttl
+        self.delete_after_parse = delete_after_parse
+        self.result_cache_size = result_cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='upload-parse')
+        self._sessions: Dict[str, UploadSession] = {}
+        self._results: 'OrderedDict[Tuple[str, Optional[str]], Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.folder, exist_ok=True)
+
+    def use_executor(self, executor: Executor) -> None:
+        """
+        Parse completed uploads on a shared pool instead of this manager's own
+
+        Lets the ASGI app keep every parse under one worker cap.
+
+        Args:
+            executor: Pool to submit parses to (e.g. ParseExecutor.executor)
+        """
+        own, self._executor = self._executor, executor
+        own.shutdown(wait=False)
+
+    def init_upload(self, filename: str, size: int, content_hash: Optional[str] = None,
+                    issuer_hint: Optional[str] = None, receipt: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Start an upload, or skip it for a file the client has a receipt for
+
+        Args:
+            filename: Sanitized original filename
+            size: Total file size in bytes
+            content_hash: Optional SHA-256 of the file, checked against the received bytes
+            issuer_hint: Optional issuer hint passed to the parser
+            receipt: Receipt from an earlier finalize of the same content hash
+
+        Returns:
+            Session view; with 'deduplicated' and 'data' when no upload is needed
+        """
+        if size <= 0:
+            raise UploadError("File size must be positive")
+        if self.max_file_size and size > self.max_file_size:
+            raise UploadError(f"File exceeds the {self.max_file_size} byte upload limit", status_code=413)
+        if content_hash:
+            content_hash = content_hash.lower()
+
+        self._expire_sessions()
+
+        upload_id = uuid.uuid4().hex
+        session = UploadSession(
+            upload_id, filename, size,
+            os.path.join(self.folder, f"{upload_id}.part"),
+            content_hash, issuer_hint
+        )
+
+        # The receipt shows these bytes were uploaded and verified before; the hash alone does not
+        result = None
+        if content_hash and receipt and self.receipt_valid(content_hash, receipt):
+            result = self._lookup(content_hash, issuer_hint)
+        if result is not None:
+            session.received = size
+            session.result = result
+            session.status = 'done'
+        else:
+            open(session.path, 'wb').close()
+
+        with self._lock:
+            self._sessions[upload_id] = session
+
+        view = session.to_dict()
+        if result is not None:
+            view['deduplicated'] = True
+            view['data'] = result
+        return view
+
+    def write_chunk(self, upload_id: str, offset: int, body: bytes,
+                    encoding: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Write a chunk at an offset; parsing starts once the last byte arrives
+
+        Chunks must continue from the current offset. Re-sent bytes that
+        overlap data already received are ignored, so a client can safely
+        retry a chunk after a dropped connection.
+
+        Args:
+            upload_id: Session ID from init_upload
+            offset: Byte offset of the (decompressed) chunk within the file
+            body: Raw request body
+            encoding: Content-Encoding of the body
+
+        Returns:
+            Session view with the new offset
+        """
+        session = self._get_session(upload_id)
+
+        with session.lock:
+            if session.status != 'uploading':
+                return session.to_dict()
+            if offset < 0 or offset > session.received:
+                raise UploadError(
+                    "Chunk offset does not continue the upload",
+                    status_code=409, offset=session.received
+                )
+
+            data = decode_body(body, encoding, session.size - offset)
+            data = data[session.received - offset:]
+
+            if data:
+                with open(session.path, 'r+b') as file:
+                    file.seek(session.received)
+                    file.write(data)
+                session.received += len(data)
+            session.updated_at = time.time()
+
+            if session.received == session.size:
+                self._start_parse(session)
+
+            return session.to_dict()
+
+    def get_status(self, upload_id: str) -> Dict[str, Any]:
+        """Return the session view (offset tells a client where to resume)"""
+        return self._get_session(upload_id).to_dict()
+
+    def finalize(self, upload_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Wait for the upload's parse to finish and return its result
+
+        Args:
+            upload_id: Session ID from init_upload
+            timeout: Seconds to wait for the parse (None waits indefinitely)
+
+        Returns:
+            Session view, with 'data' once parsing is done
+        """
+        session = self._get_complete_session(upload_id)
+
+        if session.future is not None:
+            try:
+                session.future.result(timeout=timeout)
+            except Exception:
+                # Errors are recorded on the session by _parse
+                pass
+
+        if session.status == 'error':
+            raise UploadError(session.error, status_code=422)
+
+        view = session.to_dict()
+        view['data'] = session.result
+        if session.result is not None and self.receipt_secret:
+            view['receipt'] = self.receipt(session.content_hash)
+        return view
+
+    def parse_future(self, upload_id: str) -> Optional[Future]:
+        """
+        Return the parse future of a fully received upload, for callers that await it
+
+        Raises the same errors as finalize; a later finalize(timeout=0) then
+        returns the result without blocking.
+        """
+        return self._get_complete_session(upload_id).future
+
+    def receipt(self, content_hash: str) -> str:
+        """Receipt for content whose bytes the server has received and hashed"""
+        return hmac.new(self.receipt_secret, content_hash.encode('utf-8'), hashlib.sha256).hexdigest()
+
+    def receipt_valid(self, content_hash: str, receipt: str) -> bool:
+        """Whether a receipt was issued by this server for the content hash"""
+        if not self.receipt_secret or not isinstance(receipt, str):
+            return False
+        return hmac.compare_digest(self.receipt(content_hash), receipt.lower())
+
+    def _start_parse(self, session: UploadSession) -> None:
+        """Hand a fully received file to the parse executor"""
+        session.status = 'parsing'
+        session.future = self._executor.submit(self._parse, session)
+
+    def _parse(self, session: UploadSession) -> None:
+        """Verify the assembled file, parse it and cache the result by content hash"""
+        try:
+            actual_hash = compute_content_hash(session.path)
+            if session.content_hash and session.content_hash != actual_hash:
+                raise ValueError("Uploaded content does not match the declared sha256")
+            session.content_hash = actual_hash
+
+            # The bytes are verified now, so a cached result for them can be handed out
+            result = self._lookup(actual_hash, session.issuer_hint)
+            if result is None:
+                result = self.parse_fn(session.path, session.issuer_hint)
+                self._remember(actual_hash, session.issuer_hint, result)
+
+            session.result = result
+            session.status = 'done'
+        except Exception as e:
+            self.logger.error(f"Error parsing upload {session.upload_id}: {str(e)}")
+            session.error = str(e)
+            session.status = 'error'
+        finally:
+            session.updated_at = time.time()
+            if self.delete_after_parse and os.path.exists(session.path):
+                os.remove(session.path)
+
+    def _lookup(self, content_hash: str, issuer_hint: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Find a result for known content: cached parse first, then stored text"""
+        key = (content_hash, issuer_hint)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        if self.reextract_fn is not None:
+            try:
+                result = self.reextract_fn(content_hash, issuer_hint)
+            except (KeyError, ValueError):
+                return None
+            self._remember(content_hash, issuer_hint, result)
+            return result
+
+        return None
+
+    def _remember(self, content_hash: str, issuer_hint: Optional[str], result: Dict[str, Any]) -> None:
+        """Cache a result by content hash, evicting the least recently used"""
+        with self._lock:
+            self._results[(content_hash, issuer_hint)] = result
+            self._results.move_to_end((content_hash, issuer_hint))
+            while len(self._results) > self.result_cache_size:
+                self._results.popitem(last=False)
+
+    def _get_session(self, upload_id: str) -> UploadSession:
+        """Look up a session or raise a 404 UploadError"""
+        with self._lock:
+            session = self._sessions.get(upload_id)
+        if session is None:
+            raise UploadError("Unknown or expired upload", status_code=404)
+        return session
+
+    def _get_complete_session(self, upload_id: str) -> UploadSession:
+        """Look up a session whose bytes have all arrived, or raise a 409 UploadError"""
+        session = self._get_session(upload_id)
+        if session.status == 'uploading':
+            raise UploadError(
+                f"Upload incomplete: received {session.received} of {session.size} bytes",
+                status_code=409, offset=session.received
+            )
+        return session
+
+    def _expire_sessions(self) -> None:
+        """Drop sessions idle for longer than the TTL, along with partial files"""
+        cutoff = time.time() - self.session_ttl
+        with self._lock:
+            expired = [
+                upload_id for upload_id, session in self._sessions.items()
+                if session.updated_at < cutoff and session.status != 'parsing'
+            ]
+            for upload_id in expired:
+                session = self._sessions.pop(upload_id)
+                if os.path.exists(session.path):
+                    os.remove(session.path)
+
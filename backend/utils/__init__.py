@@ -2,7 +2,10 @@
 Utils package for backend services
 """
 
-from .patterns import ISSUER_PATTERNS, COMMON_PATTERNS
+from .patterns import COMMON_PATTERNS
 from .helpers import clean_text, extract_amount, parse_date
+from .confidence import score_extraction, validate_fields
+from .text_index import TextIndex
 
-__all__ = ['ISSUER_PATTERNS', 'COMMON_PATTERNS', 'clean_text', 'extract_amount', 'parse_date']
+__all__ = ['COMMON_PATTERNS', 'clean_text', 'extract_amount', 'parse_date',
+           'score_extraction', 'validate_fields', 'TextIndex']
@@ -0,0 +1,152 @@
+"""
+Confidence scoring and cross-field validation for extracted statement data
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .helpers import validate_card_last4
+
+
+# Base score for a field depending on which pattern tier produced it
+TIER_SCORES = {
+    'hint': 1.0,
+    'issuer': 1.0,
+    'keyword': 0.9,
+    'common': 0.7,
+}
+
+# Multiplier applied to every field involved in a failed consistency check
+VALIDATION_PENALTY = 0.5
+
+# Fields that contribute to the overall confidence score
+SCORED_FIELDS = [
+    'card_issuer',
+    'card_last_4_digits',
+    'billing_cycle',
+    'payment_due_date',
+    'total_balance',
+    'minimum_payment',
+    'statement_date',
+    'account_holder',
+    'credit_limit',
+    'available_credit',
+]
+
+
+def score_extraction(data: Dict[str, Any], sources: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """
+    Score extracted fields using the pattern tier that matched and cross-field checks
+
+    Args:
+        data: Extracted field values
+        sources: Pattern tier ('issuer', 'common', ...) that produced each field
+
+    Returns:
+        Dictionary with overall score, confidence level, per-field scores and validation issues
+    """
+    field_scores = {}
+    for field in SCORED_FIELDS:
+        value = data.get(field)
+        if value is None or value == 'Unknown':
+            field_scores[field] = 0.0
+        else:
+            field_scores[field] = TIER_SCORES.get(sources.get(field), 0.5)
+
+    issues = validate_fields(data)
+    for issue in issues:
+        for field in issue['fields']:
+            field_scores[field] *= VALIDATION_PENALTY
+
+    score = sum(field_scores.values()) / len(SCORED_FIELDS)
+
+    return {
+        'score': round(score, 2),
+        'level': confidence_level(score),
+        'field_scores': {field: round(value, 2) for field, value in field_scores.items()},
+        'issues': issues,
+    }
+
+
+def confidence_level(score: float) -> str:
+    """
+    Map a numeric confidence score to a level
+
+    Args:
+        score: Confidence score between 0 and 1
+
+    Returns:
+        'high', 'medium' or 'low'
+    """
+    if score >= 0.8:
+        return 'high'
+    elif score >= 0.5:
+        return 'medium'
+    return 'low'
+
+
+def validate_fields(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Run consistency checks across extracted fields
+
+    Args:
+        data: Extracted field values
+
+    Returns:
+        List of failed checks, each with a message and the fields involved
+    """
+    issues = []
+
+    def check(ok: bool, message: str, *fields: str) -> None:
+        if not ok:
+            issues.append({'message': message, 'fields': list(fields)})
+
+    last_4 = data.get('card_last_4_digits')
+    if last_4 is not None:
+        check(validate_card_last4(last_4),
+              'Card number is not 4 digits', 'card_last_4_digits')
+
+    credit_limit = _to_float(data.get('credit_limit'))
+    available_credit = _to_float(data.get('available_credit'))
+    if credit_limit is not None and available_credit is not None:
+        check(available_credit <= credit_limit,
+              'Available credit exceeds credit limit', 'available_credit', 'credit_limit')
+
+    total_balance = _to_float(data.get('total_balance'))
+    minimum_payment = _to_float(data.get('minimum_payment'))
+    if total_balance is not None and minimum_payment is not None:
+        check(minimum_payment <= total_balance,
+              'Minimum payment exceeds total balance', 'minimum_payment', 'total_balance')
+
+    statement_date = _to_date(data.get('statement_date'))
+    due_date = _to_date(data.get('payment_due_date'))
+    if statement_date and due_date:
+        check(due_date > statement_date,
+              'Payment due date is not after statement date', 'payment_due_date', 'statement_date')
+
+    billing_cycle = data.get('billing_cycle')
+    if billing_cycle and ' to ' in billing_cycle:
+        start, end = (_to_date(part) for part in billing_cycle.split(' to ', 1))
+        if start and end:
+            check(start <= end, 'Billing cycle ends before it starts', 'billing_cycle')
+            if statement_date:
+                check(end <= statement_date,
+                      'Billing cycle ends after statement date', 'billing_cycle', 'statement_date')
+
+    return issues
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    """Convert a formatted amount to float, or None if missing or invalid"""
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _to_date(value: Optional[str]) -> Optional[datetime]:
+    """Convert a YYYY-MM-DD date to datetime, or None if missing or invalid"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else None
+    except ValueError:
+        return None
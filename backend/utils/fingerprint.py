@@ -0,0 +1,121 @@
+"""
+Statement fingerprints for near-duplicate detection
+
+A fingerprint combines the summary fields that identify a statement (card
+last 4, statement date, total balance) with a MinHash sketch of word
+shingles from its normalized text, so re-downloaded or re-printed copies of
+one statement match even when their PDF bytes differ.
+"""
+
+import re
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+# Summary fields that identify a statement
+SUMMARY_FIELDS = ('card_last_4_digits', 'statement_date', 'total_balance')
+
+# Words per shingle
+SHINGLE_SIZE = 5
+
+# MinHash slots (one-permutation hashing: each slot keeps the minimum hash in its bucket)
+SKETCH_SIZE = 64
+
+# Marker for a slot no shingle hashed into (very short texts)
+EMPTY_SLOT = 0xFFFFFFFF
+
+# Statements with fewer shingles carry too little text for the sketch to be trusted
+MIN_SHINGLES = 20
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def summary_key(data: Dict[str, Any]) -> Optional[str]:
+    """
+    Join the identifying summary fields into one exact-match key
+
+    Args:
+        data: Extracted statement data
+
+    Returns:
+        'last4|statement_date|total_balance', or None if any of them is missing
+    """
+    values = [data.get(field) for field in SUMMARY_FIELDS]
+    if any(value is None for value in values):
+        return None
+    return '|'.join(str(value) for value in values)
+
+
+def summary_conflicts(first: Dict[str, Any], second: Dict[str, Any]) -> bool:
+    """Whether two statements disagree on a summary field both of them have"""
+    return any(
+        first.get(field) is not None and second.get(field) is not None
+        and first.get(field) != second.get(field)
+        for field in SUMMARY_FIELDS
+    )
+
+
+def text_sketch(text: str) -> Tuple[array, int]:
+    """
+    MinHash sketch of the word shingles in a statement text
+
+    Text is lowercased and reduced to alphanumeric words first, so layout,
+    punctuation and whitespace differences between copies do not matter.
+
+    Args:
+        text: Cleaned statement text
+
+    Returns:
+        Tuple of (SKETCH_SIZE unsigned 32-bit slots, number of shingles)
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    sketch = array('I', [EMPTY_SLOT] * SKETCH_SIZE)
+    count = max(0, len(words) - SHINGLE_SIZE + 1)
+
+    for start in range(count):
+        value = zlib.crc32(' '.join(words[start:start + SHINGLE_SIZE]).encode('utf-8'))
+        slot = value % SKETCH_SIZE
+        value //= SKETCH_SIZE
+        if value < sketch[slot]:
+            sketch[slot] = value
+
+    return sketch, count
+
+
+def sketch_similarity(first: array, second: array) -> float:
+    """
+    Estimate the Jaccard similarity of two texts from their sketches
+
+    Slots empty in both sketches carry no information and are skipped.
+
+    Returns:
+        Fraction of informative slots that agree (0.0 - 1.0)
+    """
+    compared = matching = 0
+    for left, right in zip(first, second):
+        if left == EMPTY_SLOT and right == EMPTY_SLOT:
+            continue
+        compared += 1
+        matching += left == right
+    return matching / compared if compared else 0.0
+
+
+def sketch_bands(sketch: array, bands: int) -> List[int]:
+    """
+    Hash each band of consecutive slots for locality-sensitive lookup
+
+    Two sketches share a band hash only if every slot in that band agrees,
+    so near-identical texts collide in at least one band with high probability.
+
+    Args:
+        sketch: Sketch from text_sketch
+        bands: Number of bands (must divide SKETCH_SIZE)
+
+    Returns:
+        One 32-bit hash per band
+    """
+    rows = len(sketch) // bands
+    return [
+        zlib.crc32(sketch[band * rows:(band + 1) * rows].tobytes())
+        for band in range(bands)
+    ]
@@ -2,160 +2,13 @@
 Regex patterns for extracting data from credit card statements
 """
 
-# Issuer-specific patterns
-ISSUER_PATTERNS = {
-    'Chase': {
-        'card_number': [
-            r'Account Number[:\s]+.*?(\d{4})',
-            r'Card ending in[:\s]+(\d{4})',
-        ],
-        'billing_cycle': [
-            r'Statement Period[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})\s*-\s*(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'due_date': [
-            r'Payment Due Date[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-            r'Due Date[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'total_balance': [
-            r'New Balance[:\s]+\$?([\d,]+\.?\d{0,2})',
-            r'Total Balance[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'minimum_payment': [
-            r'Minimum Payment Due[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'statement_date': [
-            r'Statement Date[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-            r'Closing Date[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'account_holder': [
-            r'(?:Account Holder|Name)[:\s]+([A-Z][a-zA-Z\s]+)',
-        ],
-        'credit_limit': [
-            r'Credit Limit[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'available_credit': [
-            r'Available Credit[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-    },
-    'American Express': {
-        'card_number': [
-            r'Card Member[:\s]+.*?(\d{4})',
-            r'Account ending in[:\s]+(\d{4})',
-        ],
-        'billing_cycle': [
-            r'Statement Period[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})\s*to\s*(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'due_date': [
-            r'Payment Due[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'total_balance': [
-            r'Total Balance[:\s]+\$?([\d,]+\.?\d{0,2})',
-            r'New Balance[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'minimum_payment': [
-            r'Minimum Payment[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'statement_date': [
-            r'Statement Date[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'account_holder': [
-            r'Card Member[:\s]+([A-Z][a-zA-Z\s]+)',
-        ],
-        'credit_limit': [
-            r'Credit Limit[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'available_credit': [
-            r'Available for Purchases[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-    },
-    'Citibank': {
-        'card_number': [
-            r'Account Number[:\s]+.*?(\d{4})',
-        ],
-        'billing_cycle': [
-            r'Statement Period[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})\s*-\s*(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'due_date': [
-            r'Payment Due Date[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'total_balance': [
-            r'New Balance[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'minimum_payment': [
-            r'Minimum Payment Due[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'statement_date': [
-            r'Statement Closing Date[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'account_holder': [
-            r'(?:Account Holder|Primary Cardholder)[:\s]+([A-Z][a-zA-Z\s]+)',
-        ],
-        'credit_limit': [
-            r'Credit Limit[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'available_credit': [
-            r'Available Credit[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-    },
-    'Capital One': {
-        'card_number': [
-            r'Account Number[:\s]+.*?(\d{4})',
-        ],
-        'billing_cycle': [
-            r'Statement Period[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})\s*-\s*(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'due_date': [
-            r'Payment Due[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'total_balance': [
-            r'New Balance[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'minimum_payment': [
-            r'Minimum Payment[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'statement_date': [
-            r'Statement Date[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'account_holder': [
-            r'(?:Account Holder|Name)[:\s]+([A-Z][a-zA-Z\s]+)',
-        ],
-        'credit_limit': [
-            r'Credit Limit[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'available_credit': [
-            r'Available Credit[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-    },
-    'Discover': {
-        'card_number': [
-            r'Account Number[:\s]+.*?(\d{4})',
-        ],
-        'billing_cycle': [
-            r'Statement Period[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})\s*-\s*(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'due_date': [
-            r'Payment Due Date[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'total_balance': [
-            r'New Balance[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'minimum_payment': [
-            r'Minimum Payment[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'statement_date': [
-            r'Statement Closing Date[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
-        ],
-        'account_holder': [
-            r'(?:Account Holder|Name)[:\s]+([A-Z][a-zA-Z\s]+)',
-        ],
-        'credit_limit': [
-            r'Credit Limit[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-        'available_credit': [
-            r'Credit Available[:\s]+\$?([\d,]+\.?\d{0,2})',
-        ],
-    },
-}
+import re
+from typing import Dict, List, Pattern
+
+# Flags used for every extraction pattern
+PATTERN_FLAGS = re.IGNORECASE | re.MULTILINE
+
+# Issuer-specific patterns live in the profile files under issuers/
 
 # Common patterns that work across multiple issuers
 COMMON_PATTERNS = {
@@ -186,7 +39,9 @@ COMMON_PATTERNS = {
         r'Closing\s+Date[:\s]+(\d{1,2}/\d{1,2}/\d{2,4})',
     ],
     'account_holder': [
-        r'(?:Account\s+Holder|Card\s+Member|Name)[:\s]+([A-Z][a-zA-Z\s]{2,40})',
+        # Up to five name words; cleaned text is one line, so the label after the name is cut off by
+        # NAME_STOP_WORDS when the name is formatted
+        r"(?:Account\s+Holder|Card\s+Member|Name)[:\s]+([A-Z][a-zA-Z'.\-]*(?:\s+[A-Z][a-zA-Z'.\-]*){0,4})",
     ],
     'credit_limit': [
         r'Credit\s+Limit[:\s]+\$?([\d,]+\.?\d{0,2})',
@@ -197,3 +52,21 @@ COMMON_PATTERNS = {
         r'Available\s+Credit[:\s]+\$?([\d,]+\.?\d{0,2})',
     ],
 }
+
+# Words that start the next label rather than continue an account holder's name
+NAME_STOP_WORDS = frozenset({
+    'account', 'address', 'amount', 'available', 'balance', 'billing', 'card', 'cardholder',
+    'closing', 'credit', 'customer', 'date', 'due', 'ending', 'member', 'min', 'minimum',
+    'new', 'number', 'page', 'payment', 'previous', 'primary', 'statement', 'total',
+})
+
+
+def compile_patterns(patterns: Dict[str, List[str]]) -> Dict[str, List[Pattern]]:
+    """Compile a field -> patterns table once so extraction never recompiles"""
+    return {
+        field: [re.compile(pattern, PATTERN_FLAGS) for pattern in field_patterns]
+        for field, field_patterns in patterns.items()
+    }
+
+
+COMPILED_COMMON_PATTERNS = compile_patterns(COMMON_PATTERNS)
@@ -0,0 +1,311 @@
+"""
+Precomputed index over cleaned statement text
+
+Every match of a field pattern starts with one of its literal labels (or
+with a date), so instead of rescanning the whole text the pattern is only
+tried at those offsets, and only where a value of the right kind follows
+within a short window. Offsets are found lazily with substring scans of a
+lowercased copy that grows only as far as a search reaches, and are shared
+by every pattern using the same label. The search stops at the first offset
+that matches, so a label near the top of the text costs no more than a plain
+scan.
+"""
+
+import re
+from functools import lru_cache
+from heapq import merge
+from typing import Callable, Dict, Iterator, List, Optional, Pattern, Set, Tuple
+
+# Characters after an anchor checked for a value; covers a label, its separators and the value
+WINDOW_SIZE = 160
+
+# Characters lowercased when a label search first runs; the copy then doubles as needed
+LOWER_CHUNK = 4096
+
+# Patterns expanding to more literal label prefixes than this are searched in full
+MAX_ANCHORS = 32
+
+# Patterns that start with a bare date are anchored on date tokens instead of labels
+DATE_PREFIX = r'(\d{1,2}/\d{1,2}/\d{2,4})'
+
+DATE_TOKEN = re.compile(r'\d{1,2}/\d{1,2}/\d{2,4}')
+
+# Value tokens checked inside a window before any field pattern runs there
+VALUE_PATTERNS = {
+    'date': DATE_TOKEN,
+    'digits': re.compile(r'\d{4}'),
+    'number': re.compile(r'\d'),
+}
+
+# Kind of value captured by each pattern key; windows without one cannot yield a value
+FIELD_VALUE_KINDS = {
+    'card_number': 'digits',
+    'billing_cycle': 'date',
+    'due_date': 'date',
+    'statement_date': 'date',
+    'total_balance': 'number',
+    'minimum_payment': 'number',
+    'credit_limit': 'number',
+    'available_credit': 'number',
+}
+
+
+# Repeats that can consume arbitrary text: ., negated classes and \S / \D / \W
+UNBOUNDED_REPEAT = re.compile(r'(?:(?<!\\)\.|\[\^(?:\\.|[^\]])*\]|\\[SDW])[*+]')
+
+
+class _Stop(Exception):
+    """Internal: the pattern source left the literal subset understood by pattern_anchors"""
+
+
+@lru_cache(maxsize=None)
+def pattern_anchors(source: str) -> Optional[Tuple[str, ...]]:
+    """
+    Derive the lowercase literal label prefixes every match of a pattern starts with
+
+    Understands the subset used by issuer profiles and COMMON_PATTERNS:
+    literal text, escaped punctuation, \\s / \\s+ / \\s*, '?' and (?:a|b) groups.
+    Expansion stops at the first other construct (e.g. [:\\s]+ or a capture).
+
+    Args:
+        source: Pattern source (compiled with IGNORECASE)
+
+    Returns:
+        Tuple of prefixes, or None if the pattern has no usable literal start
+    """
+    prefixes, _, _ = _expand_sequence(source, 0)
+    prefixes = {prefix.lower() for prefix in prefixes}
+
+    if not prefixes or len(prefixes) > MAX_ANCHORS or any(len(prefix.strip()) < 3 for prefix in prefixes):
+        return None
+
+    # A shorter prefix already covers every longer one starting with it
+    minimal = [
+        prefix for prefix in prefixes
+        if not any(other != prefix and prefix.startswith(other) for other in prefixes)
+    ]
+    return tuple(sorted(minimal))
+
+
+@lru_cache(maxsize=None)
+def spans_unbounded(source: str) -> bool:
+    """
+    Whether a pattern can reach its value more than one window past its label
+
+    A lazy ``.*?`` between a label and its value may skip past the window, so
+    such patterns are tried at every label, without the value check. Repeats
+    of separators such as ``[:\\s]+`` stay within a window on cleaned text and
+    are not counted.
+    """
+    return UNBOUNDED_REPEAT.search(source) is not None
+
+
+def _expand_sequence(source: str, pos: int) -> Tuple[Set[str], int, bool]:
+    """
+    Expand items from pos until '|', ')' or an unsupported construct
+
+    Returns:
+        Tuple of (literal alternatives, position reached, whether the sequence ended cleanly)
+    """
+    results = {''}
+    while pos < len(source) and source[pos] not in '|)':
+        try:
+            options, next_pos, complete = _expand_item(source, pos)
+        except _Stop:
+            return results, pos, False
+
+        quantifier = source[next_pos] if next_pos < len(source) else ''
+        if quantifier == '{':
+            return results, pos, False
+        if quantifier in ('?', '*'):
+            options = options | {''}
+            next_pos += 1
+            complete = complete and quantifier == '?'
+        elif quantifier == '+':
+            next_pos += 1
+            # \s+ is exactly one space in cleaned text; any other repeat ends the expansion
+            complete = complete and options == {' '}
+
+        results = {prefix + option for prefix in results for option in options}
+        if len(results) > MAX_ANCHORS or not complete:
+            return results, next_pos, False
+        pos = next_pos
+
+    return results, pos, True
+
+
+def _expand_item(source: str, pos: int) -> Tuple[Set[str], int, bool]:
+    """Expand a single literal, escape or (?:...) group starting at pos"""
+    char = source[pos]
+
+    if char == '\\':
+        escaped = source[pos + 1:pos + 2]
+        if escaped == 's':
+            # Cleaned text has single spaces; quantifiers are handled by the caller
+            return {' '}, pos + 2, True
+        if escaped and not escaped.isalnum():
+            return {escaped}, pos + 2, True
+        raise _Stop()
+
+    if source.startswith('(?:', pos):
+        alternatives = set()
+        pos += 3
+        complete = True
+        while True:
+            options, pos, ended = _expand_sequence(source, pos)
+            alternatives |= options
+            if not ended:
+                # Skip to the end of this group; later items cannot be expanded
+                depth = 1
+                while pos < len(source) and depth:
+                    if source[pos] == '\\':
+                        pos += 1
+                    elif source[pos] == '(':
+                        depth += 1
+                    elif source[pos] == ')':
+                        depth -= 1
+                    pos += 1
+                return alternatives, pos, False
+            if pos >= len(source) or source[pos] == ')':
+                return alternatives, pos + 1, complete
+            pos += 1  # '|'
+
+    if char in '()[].^$*+?{}|':
+        raise _Stop()
+
+    return {char}, pos + 1, True
+
+
+class _Occurrences:
+    """Offsets of one label (or of dates), found on demand and shared by every pattern using it"""
+
+    def __init__(self, find_next: Callable[[int], int]):
+        self.offsets: List[int] = []
+        self._find_next = find_next
+        self._done = False
+
+    def __iter__(self) -> Iterator[int]:
+        index = 0
+        while True:
+            while index >= len(self.offsets) and not self._done:
+                offset = self._find_next(self.offsets[-1] + 1 if self.offsets else 0)
+                if offset == -1:
+                    self._done = True
+                else:
+                    self.offsets.append(offset)
+            if index >= len(self.offsets):
+                return
+            yield self.offsets[index]
+            index += 1
+
+
+class TextIndex:
+    """
+    Lazy anchored search over one cleaned statement text
+
+    Built once per text by the parser; ``search`` returns the same match as
+    ``pattern.search(text)`` but only tries offsets where a match can start.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._lower = ''
+        # Offsets are shared with the lowercased copy, which must keep its length
+        self.usable = True
+        self._labels: Dict[str, _Occurrences] = {}
+        self._dates = _Occurrences(self._find_date)
+
+    def _find_date(self, pos: int) -> int:
+        """Offset of the next full date (MM/DD/YYYY or MM/DD/YY) at or after pos, or -1"""
+        match = DATE_TOKEN.search(self.text, pos)
+        return match.start() if match else -1
+
+    def _find_label(self, label: str, pos: int) -> int:
+        """Offset of the next lowercase label at or after pos, or -1; lowercases more text as needed"""
+        while True:
+            index = self._lower.find(label, pos)
+            if index != -1 or len(self._lower) == len(self.text) or not self.usable:
+                return index if self.usable else -1
+            pos = max(pos, len(self._lower) - len(label) + 1)
+            self._lower_more()
+
+    def _lower_more(self) -> None:
+        """Double the lowercased prefix of the text (at least LOWER_CHUNK characters)"""
+        done = len(self._lower)
+        end = min(len(self.text), max(LOWER_CHUNK, 2 * done))
+        chunk = self.text[done:end].lower()
+        if len(chunk) != end - done:
+            self.usable = False
+        self._lower += chunk
+
+    def label_positions(self, label: str) -> _Occurrences:
+        """Lazily found offsets of a lowercase label phrase (cached)"""
+        occurrences = self._labels.get(label)
+        if occurrences is None:
+            occurrences = self._labels[label] = _Occurrences(lambda pos: self._find_label(label, pos))
+        return occurrences
+
+    def has_value(self, kind: Optional[str], start: int, end: int) -> bool:
+        """Whether a value of the given kind occurs within [start, end)"""
+        if kind is None:
+            return True
+        return VALUE_PATTERNS[kind].search(self.text, start, end) is not None
+
+    def starts(self, pattern: Pattern, kind: Optional[str] = None) -> Optional[Iterator[int]]:
+        """
+        Yield the offsets where a pattern can match, in document order
+
+        Args:
+            pattern: Compiled field pattern
+            kind: Value kind the pattern captures (see FIELD_VALUE_KINDS)
+
+        Returns:
+            Generator of offsets, or None when the pattern must be searched in full
+        """
+        if not self.usable or not pattern.flags & re.IGNORECASE:
+            return None
+
+        if pattern.pattern.startswith(DATE_PREFIX):
+            offsets = iter(self._dates)
+        else:
+            anchors = pattern_anchors(pattern.pattern)
+            if anchors is None:
+                return None
+            # No anchor is a prefix of another, so two never start at the same offset
+            offsets = merge(*(self.label_positions(label) for label in anchors))
+
+        if spans_unbounded(pattern.pattern):
+            kind = None
+        return (start for start in offsets if self.has_value(kind, start, start + WINDOW_SIZE))
+
+    def search(self, pattern: Pattern, kind: Optional[str] = None) -> Optional[re.Match]:
+        """
+        First match of a pattern in document order, trying only candidate offsets
+
+        Args:
+            pattern: Compiled field pattern
+            kind: Value kind the pattern captures (see FIELD_VALUE_KINDS)
+
+        Returns:
+            Match object or None
+        """
+        starts = self.starts(pattern, kind)
+        if starts is None:
+            return pattern.search(self.text)
+
+        for start in starts:
+            match = pattern.match(self.text, start)
+            if match:
+                return match
+        # A label search may have reached text whose lowercased length differs
+        return None if self.usable else pattern.search(self.text)
+
+    def stats(self) -> Dict[str, int]:
+        """Index sizes, for benchmarks and debugging"""
+        return {
+            'length': len(self.text),
+            'lowered': len(self._lower),
+            'labels_indexed': len(self._labels),
+            'label_hits': sum(len(occurrences.offsets) for occurrences in self._labels.values()),
+            'dates': len(self._dates.offsets),
+        }
@@ -1,23 +1,52 @@
-import { useState, useRef } from 'react';
+import { useState, useEffect } from 'react';
 import Header from './components/Header';
 import UploadZone from './components/UploadZone';
+import UploadQueue from './components/UploadQueue';
 import ResultsDisplay from './components/ResultsDisplay';
 import StatsCards from './components/StatsCards';
 import IssuerBadges from './components/IssuerBadges';
 import Footer from './components/Footer';
+import { fetchCapabilities, parseStatement, resolveConcurrency, runUploadQueue } from './utils/uploadScheduler';
 
 const API_BASE_URL = 'https://creditcard-assignment.onrender.com';
 
+// Optional overrides; by default concurrency follows the server's /api/capabilities hint
+const UPLOAD_CONCURRENCY = import.meta.env.VITE_UPLOAD_CONCURRENCY;
+const UPLOAD_MAX_RETRIES = Number(import.meta.env.VITE_UPLOAD_MAX_RETRIES ?? 3);
+
+const computeStats = (allResults) => {
+  const successful = allResults.filter(r => r.status === 'success').length;
+  const total = allResults.length;
+  const avgConf = allResults.reduce((acc, r) => {
+    const conf = r.data?.extraction_confidence;
+    if (conf === 'high') return acc + 100;
+    if (conf === 'medium') return acc + 65;
+    if (conf === 'low') return acc + 30;
+    return acc;
+  }, 0) / total;
+
+  return {
+    totalParsed: total,
+    successRate: total > 0 ? Math.round((successful / total) * 100) : 100,
+    avgConfidence: Math.round(avgConf) || 0
+  };
+};
+
 function App() {
   const [files, setFiles] = useState([]);
   const [uploading, setUploading] = useState(false);
   const [results, setResults] = useState([]);
+  const [queue, setQueue] = useState([]);
+  const [capabilities, setCapabilities] = useState(null);
   const [error, setError] = useState(null);
-  const [stats, setStats] = useState({
-    totalParsed: 0,
-    successRate: 100,
-    avgConfidence: 0
-  });
+
+  // Results arrive one by one, so stats are derived from them rather than stored
+  const stats = computeStats(results);
+  const concurrency = resolveConcurrency(UPLOAD_CONCURRENCY, capabilities);
+
+  useEffect(() => {
+    fetchCapabilities(API_BASE_URL).then(setCapabilities);
+  }, []);
 
   const handleFilesSelected = async (selectedFiles) => {
     setError(null);
@@ -28,106 +57,64 @@ function App() {
     }
   };
 
+  const updateQueueItem = (id, patch) => {
+    setQueue(prev => prev.map(item => (item.id === id ? { ...item, ...patch } : item)));
+  };
+
   const uploadFiles = async (filesToUpload) => {
     setUploading(true);
     setError(null);
 
+    const batchId = Date.now();
+    const items = filesToUpload.map((file, index) => ({ id: `${batchId}-${index}`, file }));
+    setQueue(items.map(item => ({ id: item.id, filename: item.file.name, status: 'queued', progress: 0 })));
+
+    const failures = [];
+
     try {
-      if (filesToUpload.length === 1) {
-        // Single file upload
-        const formData = new FormData();
-        formData.append('file', filesToUpload[0]);
-
-        const response = await fetch(`${API_BASE_URL}/api/parse`, {
-          method: 'POST',
-          body: formData,
-        });
-
-        if (!response.ok) {
-          const errorData = await response.json();
-          throw new Error(errorData.message || 'Failed to parse statement');
-        }
-
-        const data = await response.json();
-        const newResult = {
-          id: Date.now(),
-          filename: filesToUpload[0].name,
-          data: data.data,
-          status: 'success',
-          parsedAt: data.parsed_at
-        };
-
-        setResults(prev => [newResult, ...prev]);
-        updateStats([newResult, ...results]);
-      } else {
-        // Batch upload
-        const formData = new FormData();
-        filesToUpload.forEach(file => {
-          formData.append('files', file);
-        });
-
-        const response = await fetch(`${API_BASE_URL}/api/batch-parse`, {
-          method: 'POST',
-          body: formData,
-        });
-
-        if (!response.ok) {
-          throw new Error('Failed to parse statements');
-        }
-
-        const data = await response.json();
-        const newResults = data.results.map(result => ({
-          id: Date.now() + Math.random(),
-          filename: result.filename,
-          data: result.data,
-          status: result.status,
-          parsedAt: data.parsed_at
-        }));
-
-        setResults(prev => [...newResults, ...prev]);
-        updateStats([...newResults, ...results]);
+      // Each file is its own /api/parse request; its card renders as soon as it is parsed
+      await runUploadQueue(items, {
+        upload: (file, onProgress) => parseStatement(API_BASE_URL, file, onProgress),
+        concurrency,
+        maxRetries: UPLOAD_MAX_RETRIES,
+        maxFileSize: capabilities?.max_file_size || 0,
+        onUpdate: updateQueueItem,
+        onResult: (item, data) => {
+          const newResult = {
+            id: item.id,
+            filename: item.file.name,
+            data: data.data,
+            status: 'success',
+            parsedAt: data.parsed_at
+          };
+          setResults(prev => [newResult, ...prev]);
+        },
+        onError: (item, err) => {
+          failures.push(err.message);
+          console.error(`Upload error (${item.file.name}):`, err);
+        },
+      });
+
+      if (failures.length === 1 && filesToUpload.length === 1) {
+        setError(failures[0]);
+      } else if (failures.length > 0) {
+        setError(`${failures.length} of ${filesToUpload.length} statements failed to parse`);
       }
 
       setFiles([]);
-    } catch (err) {
-      setError(err.message);
-      console.error('Upload error:', err);
     } finally {
+      // Keep failed files listed so their errors stay visible
+      setQueue(prev => prev.filter(item => item.status === 'error'));
       setUploading(false);
     }
   };
 
-  const updateStats = (allResults) => {
-    const successful = allResults.filter(r => r.status === 'success').length;
-    const total = allResults.length;
-    const avgConf = allResults.reduce((acc, r) => {
-      const conf = r.data?.extraction_confidence;
-      if (conf === 'high') return acc + 100;
-      if (conf === 'medium') return acc + 65;
-      if (conf === 'low') return acc + 30;
-      return acc;
-    }, 0) / total;
-
-    setStats({
-      totalParsed: total,
-      successRate: total > 0 ? Math.round((successful / total) * 100) : 100,
-      avgConfidence: Math.round(avgConf) || 0
-    });
-  };
-
   const handleClearResults = () => {
     setResults([]);
-    setStats({
-      totalParsed: 0,
-      successRate: 100,
-      avgConfidence: 0
-    });
   };
 
   const handleRemoveResult = (id) => {
-    const newResults = results.filter(r => r.id !== id);
-    setResults(newResults);
-    updateStats(newResults);
+    setResults(prev => prev.filter(r => r.id !== id));
   };
 
   return (
@@ -159,6 +146,9 @@ function App() {
           error={error}
         />
 
+        {/* Per-file Progress */}
+        {queue.length > 0 && <UploadQueue queue={queue} concurrency={concurrency} />}
+
         {/* Results Display */}
         {results.length > 0 && (
           <ResultsDisplay 
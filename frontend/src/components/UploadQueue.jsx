@@ -0,0 +1,61 @@
+const UploadQueue = ({ queue, concurrency }) => {
+  const getStatusLabel = (item) => {
+    if (item.status === 'queued') return 'Queued';
+    if (item.status === 'uploading') return `Uploading ${Math.round((item.progress || 0) * 100)}%`;
+    if (item.status === 'parsing') return 'Parsing...';
+    if (item.status === 'retrying') return `Retrying in ${Math.ceil((item.retryInMs || 0) / 1000)}s`;
+    if (item.status === 'done') return 'Done';
+    return 'Failed';
+  };
+
+  const getStatusColor = (status) => {
+    if (status === 'done') return 'text-green-700';
+    if (status === 'error') return 'text-red-700';
+    if (status === 'retrying') return 'text-orange-600';
+    return 'text-slate-600';
+  };
+
+  const getBarColor = (status) => {
+    if (status === 'done') return 'bg-green-500';
+    if (status === 'error') return 'bg-red-400';
+    if (status === 'retrying') return 'bg-orange-400';
+    return 'bg-blue-500';
+  };
+
+  const completed = queue.filter(item => item.status === 'done' || item.status === 'error').length;
+
+  return (
+    <div className="bg-white rounded-2xl shadow-sm border border-slate-200 p-6 space-y-4">
+      <div className="flex justify-between items-center">
+        <h3 className="text-lg font-semibold text-slate-800">Upload Queue</h3>
+        <p className="text-sm text-slate-500">
+          {completed} of {queue.length} complete · up to {concurrency} at a time
+        </p>
+      </div>
+
+      <ul className="space-y-3">
+        {queue.map((item) => (
+          <li key={item.id} className="space-y-1">
+            <div className="flex justify-between items-center text-sm">
+              <span className="text-slate-700 truncate mr-4">{item.filename}</span>
+              <span className={`shrink-0 font-medium ${getStatusColor(item.status)}`}>
+                {getStatusLabel(item)}
+              </span>
+            </div>
+            <div className="h-1.5 bg-slate-100 rounded-full overflow-hidden">
+              <div
+                className={`h-full rounded-full transition-all duration-300 ${getBarColor(item.status)} ${item.status === 'parsing' ? 'animate-pulse' : ''}`}
+                style={{ width: `${item.status === 'queued' ? 0 : Math.round((item.progress || 0) * 100)}%` }}
+              />
+            </div>
+            {item.status === 'error' && item.error && (
+              <p className="text-xs text-red-600">{item.error}</p>
+            )}
+          </li>
+        ))}
+      </ul>
+    </div>
+  );
+};
+
+export default UploadQueue;
@@ -0,0 +1,151 @@
+// Client-side upload scheduler: sends files to /api/parse with bounded
+// concurrency, retries transient failures with backoff and reports
+// per-file progress so each result can be shown as soon as it arrives.
+
+const DEFAULT_CONCURRENCY = 3;
+const DEFAULT_MAX_RETRIES = 3;
+const DEFAULT_BASE_DELAY_MS = 1000;
+const MAX_DELAY_MS = 30000;
+
+// Statuses worth retrying: network failures (0), timeouts, rate limiting and
+// gateway/unavailable errors. A 500 is not retried: the backend returns it when
+// a statement cannot be parsed, which fails the same way every time.
+const RETRYABLE_STATUSES = new Set([0, 408, 429, 502, 503, 504]);
+
+export class UploadError extends Error {
+  constructor(message, status = 0, retryAfterMs = null) {
+    super(message);
+    this.status = status;
+    this.retryAfterMs = retryAfterMs;
+  }
+}
+
+const readRetryAfter = (xhr) => {
+  const header = xhr.getResponseHeader('Retry-After');
+  if (!header) return null;
+  const seconds = Number(header);
+  if (!Number.isNaN(seconds)) return seconds * 1000;
+  const date = Date.parse(header);
+  return Number.isNaN(date) ? null : Math.max(0, date - Date.now());
+};
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+export const backoffDelay = (attempt, baseDelayMs = DEFAULT_BASE_DELAY_MS) => {
+  // Exponential backoff with full jitter, so retries from parallel uploads spread out
+  const ceiling = Math.min(MAX_DELAY_MS, baseDelayMs * 2 ** attempt);
+  return Math.round(ceiling / 2 + Math.random() * (ceiling / 2));
+};
+
+export const isRetryable = (error) => error instanceof UploadError && RETRYABLE_STATUSES.has(error.status);
+
+export const fetchCapabilities = async (apiBaseUrl) => {
+  try {
+    const response = await fetch(`${apiBaseUrl}/api/capabilities`);
+    if (!response.ok) return null;
+    return await response.json();
+  } catch {
+    // Older servers have no capabilities endpoint; fall back to defaults
+    return null;
+  }
+};
+
+// Resolve the concurrency to use: explicit override, then the server hint, then the default
+export const resolveConcurrency = (override, capabilities) => {
+  const value = Number(override) || capabilities?.max_concurrent_uploads || DEFAULT_CONCURRENCY;
+  return Math.max(1, Math.floor(value));
+};
+
+// POST one file to /api/parse, reporting upload progress (0-1) as bytes are sent
+export const parseStatement = (apiBaseUrl, file, onProgress) => new Promise((resolve, reject) => {
+  const xhr = new XMLHttpRequest();
+  xhr.open('POST', `${apiBaseUrl}/api/parse`);
+  xhr.responseType = 'json';
+
+  xhr.upload.onprogress = (event) => {
+    if (event.lengthComputable) onProgress?.(event.loaded / event.total);
+  };
+  xhr.upload.onload = () => onProgress?.(1);
+
+  xhr.onload = () => {
+    const body = xhr.response || {};
+    if (xhr.status >= 200 && xhr.status < 300) {
+      resolve(body);
+    } else {
+      reject(new UploadError(body.message || `Request failed (${xhr.status})`, xhr.status, readRetryAfter(xhr)));
+    }
+  };
+  xhr.onerror = () => reject(new UploadError('Network error', 0));
+  xhr.ontimeout = () => reject(new UploadError('Request timed out', 408));
+
+  const formData = new FormData();
+  formData.append('file', file);
+  xhr.send(formData);
+});
+
+/**
+ * Upload a list of files with at most `concurrency` requests in flight.
+ *
+ * @param {Array<{id: string, file: File}>} items - Files to upload, in order
+ * @param {object} options
+ * @param {(file: File, onProgress: Function) => Promise<object>} options.upload - Sends one file
+ * @param {number} options.concurrency - Maximum parallel uploads
+ * @param {number} options.maxRetries - Retries per file for retryable failures
+ * @param {number} options.baseDelayMs - First backoff delay
+ * @param {number} options.maxFileSize - Files larger than this fail without being sent (0 = no limit)
+ * @param {(id: string, patch: object) => void} options.onUpdate - Per-file status/progress changes
+ * @param {(item: object, response: object) => void} options.onResult - Called as each file succeeds
+ * @param {(item: object, error: Error) => void} options.onError - Called when a file finally fails
+ */
+export const runUploadQueue = async (items, {
+  upload,
+  concurrency = DEFAULT_CONCURRENCY,
+  maxRetries = DEFAULT_MAX_RETRIES,
+  baseDelayMs = DEFAULT_BASE_DELAY_MS,
+  maxFileSize = 0,
+  onUpdate = () => {},
+  onResult = () => {},
+  onError = () => {},
+}) => {
+  const processItem = async (item) => {
+    if (maxFileSize && item.file.size > maxFileSize) {
+      const error = new UploadError(`File exceeds the ${Math.round(maxFileSize / (1024 * 1024))}MB limit`, 413);
+      onUpdate(item.id, { status: 'error', error: error.message });
+      onError(item, error);
+      return;
+    }
+
+    for (let attempt = 0; ; attempt += 1) {
+      onUpdate(item.id, { status: 'uploading', progress: 0, attempt });
+      try {
+        const response = await upload(item.file, (progress) => {
+          onUpdate(item.id, { status: progress >= 1 ? 'parsing' : 'uploading', progress });
+        });
+        onUpdate(item.id, { status: 'done', progress: 1 });
+        onResult(item, response);
+        return;
+      } catch (error) {
+        if (!isRetryable(error) || attempt >= maxRetries) {
+          onUpdate(item.id, { status: 'error', error: error.message });
+          onError(item, error);
+          return;
+        }
+        const delay = error.retryAfterMs ?? backoffDelay(attempt, baseDelayMs);
+        onUpdate(item.id, { status: 'retrying', error: error.message, retryInMs: delay });
+        await sleep(delay);
+      }
+    }
+  };
+
+  // A fixed pool of workers pulls the next queued file as soon as one finishes
+  let next = 0;
+  const worker = async () => {
+    while (next < items.length) {
+      const item = items[next];
+      next += 1;
+      await processItem(item);
+    }
+  };
+
+  await Promise.all(Array.from({ length: Math.min(concurrency, items.length) }, worker));
+};